@@ -0,0 +1,107 @@
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from django.test import override_settings
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+# Measurements of the last run, for comparing runs by hand.
+RESULTS_PATH = Path(__file__).parent / "results.json"
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks")
+    group.addoption(
+        "--benchmark-posts", type=int, default=5000,
+        help="Количество публикаций в сгенерированном наборе данных.",
+    )
+    group.addoption(
+        "--benchmark-rounds", type=int, default=20,
+        help="Количество замеров каждой страницы.",
+    )
+    group.addoption(
+        "--benchmark-threshold", type=float, default=1.5,
+        help="Во сколько раз страница может стать медленнее базовой линии.",
+    )
+    group.addoption(
+        "--update-baseline", action="store_true",
+        help="Записать результаты замеров как новую базовую линию.",
+    )
+
+
+def pytest_configure(config):
+    config.benchmark_results = {}
+    config.benchmark_report = {}
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    if config.benchmark_report:
+        RESULTS_PATH.write_text(json.dumps(
+            config.benchmark_report, indent=2, sort_keys=True,
+            ensure_ascii=False,
+        ) + "\n")
+    if not config.getoption("--update-baseline", False):
+        return
+    if not config.benchmark_results:
+        return
+    baseline = (
+        json.loads(BASELINE_PATH.read_text())
+        if BASELINE_PATH.exists() else {}
+    )
+    baseline.update(config.benchmark_results)
+    BASELINE_PATH.write_text(
+        json.dumps(baseline, indent=2, sort_keys=True) + "\n"
+    )
+
+
+@pytest.fixture(autouse=True)
+def enable_debug_false():
+    with override_settings(DEBUG=False):
+        yield
+
+
+@pytest.fixture
+def record_benchmark(request):
+    """Store a measurement of the test in results.json."""
+    def record(name, values):
+        request.config.benchmark_report[name] = values
+    return record
+
+
+@pytest.fixture(scope="session")
+def baseline():
+    if not BASELINE_PATH.exists():
+        return {}
+    return json.loads(BASELINE_PATH.read_text())
+
+
+@pytest.fixture(scope="session")
+def dataset(request, django_db_setup, django_db_blocker):
+    """
+    Generate the large data set once per session. It lives outside
+    the per-test transactions, so every benchmark sees the same rows.
+    """
+    from blog.generation import generate_blog_data
+    from blog.models import Comment, Post
+
+    posts = request.config.getoption("--benchmark-posts")
+    with django_db_blocker.unblock():
+        generate_blog_data(
+            users=max(posts // 50, 1),
+            categories=max(posts // 500, 1),
+            locations=max(posts // 200, 1),
+            posts=posts,
+            comments=posts * 5,
+            seed=0,
+        )
+        # The busiest visible thread is the worst case for the post page.
+        post = Post.objects.published().order_by("-comment_count").first()
+        comment = Comment.objects.filter(post=post).first()
+        return SimpleNamespace(
+            post=post,
+            comment=comment,
+            category=post.category,
+            author=post.author,
+        )
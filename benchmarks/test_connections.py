@@ -0,0 +1,97 @@
+import statistics
+import time
+from contextlib import contextmanager
+
+import pytest
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.db import connections
+from django.test import RequestFactory
+from django.urls import reverse
+
+from blog.connections import get_connection_stats, reset_connection_stats
+from blog.generation import generate_blog_data
+
+POSTS = 500
+ROUNDS = 50
+
+
+@contextmanager
+def file_database(path, conn_max_age):
+    """
+    Swap the 'default' connection for one to an SQLite file. The test
+    database lives in memory and Django never closes such connections,
+    so reuse can only be measured on a file.
+    """
+    original = connections["default"]
+    wrapper = type(original)(
+        {
+            **original.settings_dict,
+            "NAME": str(path),
+            "CONN_MAX_AGE": conn_max_age,
+        },
+        "default",
+    )
+    connections["default"] = wrapper
+    try:
+        yield wrapper
+    finally:
+        wrapper.close()
+        connections["default"] = original
+
+
+def measure_index(path, conn_max_age):
+    """
+    Serve the index page through the WSGI handler, which opens and
+    closes connections like a real server does. Return the latencies
+    in milliseconds and the connection stats of the run.
+    """
+    with file_database(path, conn_max_age):
+        call_command("migrate", verbosity=0)
+        generate_blog_data(
+            users=10, categories=5, locations=10, posts=POSTS,
+            comments=POSTS * 5, seed=0,
+        )
+        connections["default"].close()
+        handler = WSGIHandler()
+        url = reverse("blog:index")
+        reset_connection_stats()
+        timings = []
+        for _ in range(ROUNDS):
+            cache.clear()
+            environ = RequestFactory().get(url).environ
+            started = time.perf_counter()
+            response = handler(environ, lambda status, headers: None)
+            response.close()
+            timings.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200
+        return timings, get_connection_stats()["databases"]["default"]
+
+
+@pytest.mark.skipif(
+    connections["default"].vendor != "sqlite",
+    reason="Замер проводится на файле SQLite.",
+)
+def test_connection_reuse(tmp_path, django_db_blocker, record_benchmark):
+    with django_db_blocker.unblock():
+        closed, closed_stats = measure_index(tmp_path / "closed.sqlite3", 0)
+        reused, reused_stats = measure_index(tmp_path / "reused.sqlite3", 60)
+    closed_p50 = statistics.median(closed)
+    reused_p50 = statistics.median(reused)
+    record_benchmark(
+        "conn_max_age_0", {"p50_ms": round(closed_p50, 2), **closed_stats}
+    )
+    record_benchmark(
+        "conn_max_age_60", {"p50_ms": round(reused_p50, 2), **reused_stats}
+    )
+    assert closed_stats["opens"] == ROUNDS
+    assert reused_stats["opens"] == 1, (
+        "Убедитесь, что при CONN_MAX_AGE соединение сохраняется между"
+        " запросами."
+    )
+    assert reused_stats["reuses"] == ROUNDS - 1
+    assert reused_p50 < closed_p50, (
+        "Убедитесь, что повторное использование соединений ускоряет"
+        " ответы."
+    )
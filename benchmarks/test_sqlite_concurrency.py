@@ -0,0 +1,123 @@
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+
+from blog.sqlite import apply_pragmas
+
+WRITERS = 8
+READERS = 4
+WRITES_PER_WRITER = 200
+
+# SQLite defaults: rollback journal, full sync and no waiting for the
+# lock.
+DEFAULT_PRAGMAS = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "busy_timeout": 0,
+}
+
+
+def _connect(path, pragmas):
+    # timeout=0 leaves waiting to the busy_timeout pragma.
+    conn = sqlite3.connect(path, timeout=0, check_same_thread=False)
+    apply_pragmas(conn, pragmas)
+    return conn
+
+
+def _write(path, pragmas, writer, written, errors):
+    try:
+        conn = _connect(path, pragmas)
+    except sqlite3.OperationalError as error:
+        errors.append(str(error))
+        return
+    for i in range(WRITES_PER_WRITER):
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO comment (post_id, text) VALUES (?, ?)",
+                    (writer, f"Комментарий {i}")
+                )
+            written.append(1)
+        except sqlite3.OperationalError as error:
+            errors.append(str(error))
+    conn.close()
+
+
+def _read(path, pragmas, stop, errors):
+    try:
+        conn = _connect(path, pragmas)
+    except sqlite3.OperationalError as error:
+        errors.append(str(error))
+        return
+    while not stop.is_set():
+        try:
+            conn.execute(
+                "SELECT post_id, COUNT(*) FROM comment GROUP BY post_id"
+            ).fetchall()
+        except sqlite3.OperationalError as error:
+            errors.append(str(error))
+    conn.close()
+
+
+def run_workload(path, pragmas):
+    """
+    Insert comments from several writer threads while readers keep
+    scanning the table. Return the committed rows per second and the
+    number of "database is locked" errors.
+    """
+    conn = _connect(path, pragmas)
+    conn.execute(
+        "CREATE TABLE comment "
+        "(id INTEGER PRIMARY KEY, post_id INTEGER, text TEXT)"
+    )
+    conn.close()
+
+    errors, written = [], []
+    stop = threading.Event()
+    readers = [
+        threading.Thread(target=_read, args=(path, pragmas, stop, errors))
+        for _ in range(READERS)
+    ]
+    writers = [
+        threading.Thread(
+            target=_write, args=(path, pragmas, writer, written, errors)
+        )
+        for writer in range(WRITERS)
+    ]
+    started = time.perf_counter()
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in readers:
+        thread.join()
+    locked = sum("locked" in error for error in errors)
+    return len(written) / elapsed, locked
+
+
+def test_tuned_pragmas_remove_lock_errors(tmp_path, record_benchmark):
+    default_rate, default_locked = run_workload(
+        str(tmp_path / "default.sqlite3"), DEFAULT_PRAGMAS
+    )
+    tuned_rate, tuned_locked = run_workload(
+        str(tmp_path / "tuned.sqlite3"), settings.SQLITE_PRAGMAS
+    )
+    record_benchmark(
+        "default_pragmas",
+        {"rows_per_s": round(default_rate), "locked": default_locked},
+    )
+    record_benchmark(
+        "sqlite_pragmas",
+        {"rows_per_s": round(tuned_rate), "locked": tuned_locked},
+    )
+    assert tuned_locked == 0, (
+        "Убедитесь, что при настройках SQLITE_PRAGMAS параллельные"
+        " записи не получают ошибку database is locked."
+    )
+    assert tuned_rate > default_rate, (
+        "Убедитесь, что WAL и synchronous=NORMAL ускоряют запись."
+    )
@@ -0,0 +1,162 @@
+import statistics
+import time
+import tracemalloc
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.urls import get_resolver, reverse
+
+pytestmark = [pytest.mark.django_db]
+
+# Timings below this many milliseconds are noise, not regressions.
+LATENCY_SLACK_MS = 5
+
+
+def post_author(data):
+    return data.author
+
+
+def comment_author(data):
+    return data.comment.author
+
+
+def no_kwargs(data):
+    return {}
+
+
+def post_kwargs(data):
+    return {"post_id": data.post.pk}
+
+
+def comment_kwargs(data):
+    return {"post_id": data.post.pk, "comment_id": data.comment.pk}
+
+
+def profile_kwargs(data):
+    return {"profilename": data.author.username}
+
+
+# URL kwargs of every named route, built from the data set, and the
+# user who requests the page, if any.
+ROUTES = {
+    "blog:index": (no_kwargs, None),
+    "blog:search": (no_kwargs, None),
+    "blog:stats": (no_kwargs, None),
+    "blog:post_detail": (post_kwargs, None),
+    "blog:create_post": (no_kwargs, post_author),
+    "blog:edit_post": (post_kwargs, post_author),
+    "blog:delete_post": (post_kwargs, post_author),
+    "blog:category_posts": (
+        lambda data: {"category_slug": data.category.slug}, None
+    ),
+    "blog:profile": (profile_kwargs, None),
+    "blog:edit_profile": (profile_kwargs, post_author),
+    "blog:add_comment": (post_kwargs, post_author),
+    "blog:edit_comment": (comment_kwargs, comment_author),
+    "blog:delete_comment": (comment_kwargs, comment_author),
+    "pages:about": (no_kwargs, None),
+    "pages:rules": (no_kwargs, None),
+}
+QUERY_STRINGS = {"blog:search": "?q=кошка"}
+# Routes that only accept POST, with the submitted data.
+POST_DATA = {"blog:add_comment": {"text": "Комментарий для замера"}}
+
+
+def _route_names(namespace):
+    resolver = get_resolver().namespace_dict[namespace][1]
+    return {
+        f"{namespace}:{name}" for name in resolver.reverse_dict
+        if isinstance(name, str)
+    }
+
+
+def test_every_route_is_benchmarked():
+    missing = (_route_names("blog") | _route_names("pages")) - set(ROUTES)
+    assert not missing, (
+        f"Добавьте в ROUTES замеры для страниц: {sorted(missing)}."
+    )
+
+
+def measure(request_page, rounds):
+    """
+    Request the page `rounds` times with an empty cache. Return the
+    latency percentiles, the number of queries and the peak memory
+    allocated while rendering.
+    """
+    timings = []
+    for _ in range(rounds):
+        cache.clear()
+        started = time.perf_counter()
+        response = request_page()
+        timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code < 500
+
+    queries = []
+
+    def count_query(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    cache.clear()
+    with connection.execute_wrapper(count_query):
+        request_page()
+
+    cache.clear()
+    tracemalloc.start()
+    try:
+        request_page()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[int(0.95 * (len(timings) - 1))], 2),
+        "queries": len(queries),
+        "peak_kib": round(peak / 1024),
+    }
+
+
+@pytest.mark.parametrize("name", sorted(ROUTES))
+def test_view_performance(
+    name, client, dataset, baseline, request, record_benchmark
+):
+    config = request.config
+    build_kwargs, get_user = ROUTES[name]
+    if get_user is not None:
+        client.force_login(get_user(dataset))
+    url = reverse(name, kwargs=build_kwargs(dataset))
+    url += QUERY_STRINGS.get(name, "")
+
+    if name in POST_DATA:
+        def request_page():
+            return client.post(url, POST_DATA[name])
+    else:
+        def request_page():
+            return client.get(url)
+
+    request_page()  # Warm up imports and template loaders.
+    result = measure(request_page, config.getoption("--benchmark-rounds"))
+    config.benchmark_results[name] = result
+    record_benchmark(name, result)
+
+    expected = baseline.get(name)
+    if expected is None or config.getoption("--update-baseline"):
+        return
+    threshold = config.getoption("--benchmark-threshold")
+    assert result["queries"] <= expected["queries"], (
+        f"Страница {name} выполняет {result['queries']} запросов вместо"
+        f" {expected['queries']}."
+    )
+    assert result["p95_ms"] <= (
+        expected["p95_ms"] * threshold + LATENCY_SLACK_MS
+    ), (
+        f"Страница {name} стала медленнее: p95 {result['p95_ms']} мс"
+        f" против {expected['p95_ms']} мс в базовой линии."
+    )
+    assert result["peak_kib"] <= expected["peak_kib"] * threshold, (
+        f"Страница {name} стала занимать больше памяти:"
+        f" {result['peak_kib']} КиБ против {expected['peak_kib']} КиБ."
+    )
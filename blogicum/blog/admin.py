@@ -1,21 +1,66 @@
 from django.contrib import admin
-from .models import Category, Location, Post
+from .models import Category, Comment, Location, Post
+from .paginators import ApproximateCountPaginator
+from .search import search_posts
 
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ('title', 'is_published', 'created_at')
+    list_display = (
+        'title', 'is_published', 'published_post_count', 'created_at'
+    )
+    search_fields = ('title',)
     prepopulated_fields = {'slug': ('title',)}
 
 
 @admin.register(Location)
 class LocationAdmin(admin.ModelAdmin):
     list_display = ('name', 'is_published', 'created_at')
+    search_fields = ('name',)
 
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
     list_display = ('title', 'author', 'category',
                     'location', 'pub_date', 'is_published')
-    list_filter = ('category', 'location', 'is_published', 'pub_date')
+    list_filter = ('category', 'location', 'is_published', 'is_visible')
+    list_select_related = ('author', 'category', 'location')
     search_fields = ('title', 'text')
+    autocomplete_fields = ('author', 'category', 'location')
+    date_hierarchy = 'pub_date'
+    paginator = ApproximateCountPaginator
+    # The unfiltered total would be another COUNT(*) over all posts.
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # Use the search index instead of LIKE scans over the text.
+        if not search_term.strip():
+            return queryset, False
+        return search_posts(search_term, queryset), False
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'post', 'author', 'is_published')
+    list_filter = ('is_published',)
+    list_select_related = ('post', 'author')
+    raw_id_fields = ('post',)
+    autocomplete_fields = ('author',)
+    actions = ('hide_comments', 'publish_comments')
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+
+    # The built-in "delete selected" action calls queryset.delete(),
+    # which already shifts the post counters in bulk.
+
+    @admin.action(description='Скрыть выбранные комментарии')
+    def hide_comments(self, request, queryset):
+        changed = queryset.set_published(False)
+        self.message_user(request, f'Скрыто комментариев: {changed}.')
+
+    @admin.action(description='Опубликовать выбранные комментарии')
+    def publish_comments(self, request, queryset):
+        changed = queryset.set_published(True)
+        self.message_user(
+            request, f'Опубликовано комментариев: {changed}.'
+        )
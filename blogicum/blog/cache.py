@@ -0,0 +1,192 @@
+import hashlib
+import math
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+
+from .models import Post
+
+POST_CARD_TIMEOUT = 60 * 60
+POST_CARD_GENERATION_KEY = 'post_card:generation'
+
+
+def get_post_cards_generation():
+    """
+    Return the current generation of cached post cards. Bumping it
+    invalidates every card at once.
+    """
+    return cache.get_or_set(POST_CARD_GENERATION_KEY, 1, None)
+
+
+def invalidate_post_cards():
+    """Drop all cached post cards, e.g. after a category is renamed."""
+    try:
+        cache.incr(POST_CARD_GENERATION_KEY)
+    except ValueError:
+        cache.set(POST_CARD_GENERATION_KEY, 1, None)
+
+
+def post_card_key(post_id, generation):
+    return f'post_card:{generation}:{post_id}'
+
+
+def post_card_version(post):
+    """
+    Describe the post state rendered by a card. The comment counter
+    is updated without touching `updated_at`, so it is part of it.
+    """
+    return f'{post.updated_at.timestamp()}:{post.comment_count}'
+
+
+def invalidate_post_card(post_id):
+    cache.delete(post_card_key(post_id, get_post_cards_generation()))
+
+
+PAGE_CACHE_TIMEOUT = 60 * 5
+PAGE_CACHE_HITS_KEY = 'page_cache:hits'
+PAGE_CACHE_MISSES_KEY = 'page_cache:misses'
+
+
+def incr_counter(key, delta=1):
+    """Increment a persistent counter in the cache, creating it if needed."""
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key, delta)
+
+
+# Purging this group invalidates every cached page.
+ALL_PAGES = 'all'
+
+
+def get_page_group_versions(*groups):
+    keys = [f'page_cache:group:{group}' for group in groups]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            versions[key] = cache.get_or_set(key, 1, None)
+    return [versions[key] for key in keys]
+
+
+def purge_pages(*groups):
+    """Invalidate every cached page of the given groups."""
+    for group in groups:
+        try:
+            cache.incr(f'page_cache:group:{group}')
+        except ValueError:
+            cache.set(f'page_cache:group:{group}', 1, None)
+
+
+def category_page_group(slug):
+    return f'category:{slug}'
+
+
+def get_page_cache_stats():
+    return {
+        'hits': cache.get(PAGE_CACHE_HITS_KEY, 0),
+        'misses': cache.get(PAGE_CACHE_MISSES_KEY, 0),
+    }
+
+
+def _page_cache_key(request, group):
+    return 'page_cache:{}:{}:{}:{}'.format(
+        group,
+        *get_page_group_versions(ALL_PAGES, group),
+        hashlib.md5(request.get_full_path().encode()).hexdigest()
+    )
+
+
+def get_next_visibility_date():
+    """
+    Return `Post.objects.next_visibility_date()` cached under the
+    versions of the index and all-pages groups. Every change that can
+    move the date (a post saved, a category hidden or shown, posts
+    made visible) purges the index, so the cached value is dropped by
+    the handlers that already call `purge_pages`. A date that is due
+    is looked up again, as the scheduler purging the index may run in
+    another process.
+    """
+    key = 'page_cache:next_visibility:{}:{}'.format(
+        *get_page_group_versions(ALL_PAGES, 'index')
+    )
+    cached = cache.get(key)
+    if cached is None or cached[0] is not None and cached[0] <= timezone.now():
+        # Wrapped in a tuple, so that "no deferred posts" is cached too.
+        cached = (Post.objects.next_visibility_date(),)
+        cache.set(key, cached, PAGE_CACHE_TIMEOUT)
+    return cached[0]
+
+
+def _page_expiry(timeout, scheduled_posts):
+    """
+    Return the moment a cached page goes stale and its timeout.
+    Pages listing posts expire when the next deferred post is due,
+    so they do not depend on the purge sent by the scheduler reaching
+    this cache. While a due post waits for the scheduler, pages are
+    not cached at all.
+    """
+    expires = get_next_visibility_date() if scheduled_posts else None
+    if expires is None:
+        return None, timeout
+    seconds = math.ceil((expires - timezone.now()).total_seconds())
+    return expires, min(timeout, seconds)
+
+
+def anonymous_page_cache(
+    view, group, timeout=PAGE_CACHE_TIMEOUT, scheduled_posts=True
+):
+    """
+    Cache the whole response of `view` for anonymous GET requests.
+
+    `group` names the set of pages purged together by `purge_pages`
+    and may reference URL kwargs, e.g. 'category:{category_slug}'.
+    With `scheduled_posts` a cached page expires as soon as the next
+    deferred post is due.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (
+            request.method not in ('GET', 'HEAD')
+            or request.user.is_authenticated
+        ):
+            return view(request, *args, **kwargs)
+
+        key = _page_cache_key(request, group.format(**kwargs))
+        cached = cache.get(key)
+        if cached is not None:
+            response, expires = cached
+            if expires is None or timezone.now() < expires:
+                incr_counter(PAGE_CACHE_HITS_KEY)
+                # The ETag stored with the page answers conditional
+                # requests without hashing the body.
+                not_modified = get_conditional_response(
+                    request, etag=response.get('ETag')
+                )
+                if not_modified is not None:
+                    response = not_modified
+                response['X-Page-Cache'] = 'HIT'
+                return response
+
+        incr_counter(PAGE_CACHE_MISSES_KEY)
+        response = view(request, *args, **kwargs)
+        patch_vary_headers(response, ('Cookie',))
+        response['X-Page-Cache'] = 'MISS'
+        if response.status_code != 200 or response.streaming:
+            return response
+
+        expires, page_timeout = _page_expiry(timeout, scheduled_posts)
+
+        def store(response):
+            if page_timeout > 0 and not response.cookies:
+                cache.set(key, (response, expires), page_timeout)
+
+        if hasattr(response, 'add_post_render_callback'):
+            response.add_post_render_callback(store)
+        else:
+            store(response)
+        return response
+
+    return wrapper
@@ -0,0 +1,68 @@
+import os
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections
+
+CONNECTION_EVENTS = ('opens', 'reuses', 'failures')
+
+_lock = threading.Lock()
+_stats = {'pid': os.getpid(), 'counts': Counter()}
+
+
+def record_connection_event(alias, event):
+    """Count a connection event of this worker process."""
+    with _lock:
+        # A forked worker starts its own stats.
+        if _stats['pid'] != os.getpid():
+            _stats['pid'], _stats['counts'] = os.getpid(), Counter()
+        _stats['counts'][alias, event] += 1
+
+
+def get_connection_stats():
+    """Return the connection opens, reuses and failures of this worker."""
+    with _lock:
+        counts = (
+            _stats['counts'] if _stats['pid'] == os.getpid() else Counter()
+        )
+        aliases = sorted({alias for alias, _ in counts})
+        return {
+            'pid': os.getpid(),
+            'databases': {
+                alias: {
+                    event: counts[alias, event] for event in CONNECTION_EVENTS
+                }
+                for alias in aliases
+            },
+        }
+
+
+def reset_connection_stats():
+    with _lock:
+        _stats['pid'], _stats['counts'] = os.getpid(), Counter()
+
+
+def check_connections():
+    """
+    Check the persistent connections kept from previous requests
+    before they are reused, closing the broken ones so that they are
+    reopened on first use. Connections inside a transaction are left
+    alone.
+
+    Django 3.2 only drops a persistent connection after an error was
+    seen on it; this also catches connections closed by the server.
+    The check costs a round trip per open connection, so it can be
+    turned off with BLOG_CONN_HEALTH_CHECKS = False.
+    """
+    for connection in connections.all():
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        if (
+            getattr(settings, 'BLOG_CONN_HEALTH_CHECKS', True)
+            and not connection.is_usable()
+        ):
+            record_connection_event(connection.alias, 'failures')
+            connection.close()
+        else:
+            record_connection_event(connection.alias, 'reuses')
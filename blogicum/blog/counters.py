@@ -0,0 +1,285 @@
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db.models import (
+    Case, Count, F, IntegerField, OuterRef, Subquery, Value, When
+)
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Category, Comment, Post, ProfileStats, User
+
+# Post fields deciding which stored post counters include the post.
+POST_COUNTER_FIELDS = ('author_id', 'category_id', 'is_visible')
+
+
+class _CounterState(threading.local):
+    """Per-thread bookkeeping of the comment counter signal handlers."""
+
+    def __init__(self):
+        self.suspended = 0
+        self.deleting_posts = set()
+
+
+_state = _CounterState()
+
+# Sent with `post_ids` whenever stored comment counters change.
+comment_counts_changed = Signal()
+# Sent with `category_ids` and `author_ids` when the reconciler
+# corrects stored post counters.
+post_counts_changed = Signal()
+
+
+@contextmanager
+def suspend_comment_counter():
+    """Stop the signal handlers from updating `comment_count`."""
+    _state.suspended += 1
+    try:
+        yield
+    finally:
+        _state.suspended -= 1
+
+
+@contextmanager
+def post_deletion(post_ids):
+    """
+    Skip counter updates for comments removed along with the posts
+    inside the block, even if the deletion fails halfway.
+    """
+    post_ids = set(post_ids) - _state.deleting_posts
+    _state.deleting_posts |= post_ids
+    try:
+        yield
+    finally:
+        _state.deleting_posts -= post_ids
+
+
+def is_comment_counter_tracked(post_id):
+    return not _state.suspended and post_id not in _state.deleting_posts
+
+
+def increment_comment_count(post_id, delta=1):
+    """
+    Atomically shift the counter of one post by `delta`. The post
+    `updated_at` is touched too, as its page has changed.
+    """
+    Post.objects.filter(pk=post_id).update(
+        comment_count=F('comment_count') + delta,
+        updated_at=timezone.now()
+    )
+    comment_counts_changed.send(sender=Post, post_ids=[post_id])
+
+
+def adjust_comment_counts(deltas):
+    """
+    Atomically shift the counters of several posts in one UPDATE.
+    `deltas` maps a post id to the value added to its counter.
+    """
+    if not deltas:
+        return
+    Post.objects.filter(pk__in=deltas).update(
+        comment_count=F('comment_count') + Case(
+            *(When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()),
+            default=Value(0),
+            output_field=IntegerField()
+        ),
+        updated_at=timezone.now()
+    )
+    comment_counts_changed.send(sender=Post, post_ids=list(deltas))
+
+
+def real_comment_count():
+    """
+    Return an expression counting the published comments of the outer
+    post.
+    """
+    return Coalesce(
+        Subquery(
+            Comment.objects.filter(post=OuterRef('pk'), is_published=True)
+            .order_by()
+            .values('post')
+            .annotate(count=Count('pk'))
+            .values('count'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def reconcile_comment_counts(posts):
+    """
+    Fix `comment_count` of the given posts that disagree with the
+    comment table. Return the number of corrected posts.
+    """
+    stale_ids = list(
+        posts.annotate(real_count=real_comment_count())
+        .exclude(comment_count=F('real_count'))
+        .values_list('pk', flat=True)
+    )
+    if stale_ids:
+        Post.objects.filter(pk__in=stale_ids).update(
+            comment_count=real_comment_count(),
+            updated_at=timezone.now()
+        )
+        comment_counts_changed.send(sender=Post, post_ids=stale_ids)
+    return len(stale_ids)
+
+
+def post_counter_state(row):
+    """
+    Turn the POST_COUNTER_FIELDS values of a post into
+    `(author_id, category_id, is_visible)`.
+    """
+    author_id, category_id, is_visible = row
+    return author_id, category_id, bool(is_visible)
+
+
+def get_post_counter_state(post_id):
+    """Return the counter state of a stored post, or None."""
+    row = Post.objects.filter(pk=post_id).values_list(
+        *POST_COUNTER_FIELDS
+    ).first()
+    return None if row is None else post_counter_state(row)
+
+
+def _shift_counters(queryset, deltas_by_field):
+    """
+    Atomically add the deltas to the counter fields of the rows in one
+    UPDATE. `deltas_by_field` maps a field name to `{pk: delta}`.
+    """
+    deltas_by_field = {
+        field: {pk: delta for pk, delta in deltas.items() if delta}
+        for field, deltas in deltas_by_field.items()
+    }
+    pks = set().union(*deltas_by_field.values()) - {None}
+    if not pks:
+        return
+    queryset.filter(pk__in=pks).update(**{
+        field: F(field) + Case(
+            *(When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()),
+            default=Value(0),
+            output_field=IntegerField()
+        )
+        for field, deltas in deltas_by_field.items()
+    })
+
+
+def update_post_counts(old, new):
+    """
+    Move one post from the counters of its `old` counter state to
+    those of the `new` one. None stands for a post that does not
+    exist, before creation or after deletion.
+    """
+    totals, published, categories = Counter(), Counter(), Counter()
+    for state, sign in ((old, -1), (new, 1)):
+        if state is None:
+            continue
+        author_id, category_id, is_visible = state
+        totals[author_id] += sign
+        if is_visible:
+            published[author_id] += sign
+            categories[category_id] += sign
+    shift_post_counts(categories, published, totals)
+
+
+def shift_post_counts(categories, published, totals=None):
+    """
+    Add the deltas to the stored counters of published posts by
+    category and by author, and to the total post counters of
+    authors. Each argument maps an id to its delta.
+    """
+    totals = totals or {}
+    _shift_counters(
+        Category.objects, {'published_post_count': categories}
+    )
+    # Stats rows are only created for growing counters: a shrinking
+    # one already has its row, unless the author is being deleted.
+    new_authors = [
+        author_id for author_id in {*totals, *published}
+        if totals.get(author_id, 0) > 0 or published.get(author_id, 0) > 0
+    ]
+    if new_authors:
+        ProfileStats.objects.bulk_create(
+            [ProfileStats(user_id=author_id) for author_id in new_authors],
+            ignore_conflicts=True
+        )
+    _shift_counters(ProfileStats.objects, {
+        'post_count': totals, 'published_post_count': published
+    })
+
+
+def _post_count(posts, field):
+    """Return an expression counting the `posts` of the outer row."""
+    return Coalesce(
+        Subquery(
+            posts.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(count=Count('pk'))
+            .values('count'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def reconcile_post_counts(categories=None, authors=None):
+    """
+    Recount the stored post counters of the given categories and
+    authors (all by default) and fix the ones that disagree with the
+    posts table. Return the numbers of corrected categories and
+    authors.
+    """
+    if categories is None:
+        categories = Category.objects.all()
+    if authors is None:
+        authors = User.objects.all()
+    published = Post.objects.published()
+
+    stale_categories = list(
+        categories.annotate(real_count=_post_count(published, 'category'))
+        .exclude(published_post_count=F('real_count'))
+        .values_list('pk', 'real_count')
+    )
+    Category.objects.bulk_update(
+        [
+            Category(pk=pk, published_post_count=count)
+            for pk, count in stale_categories
+        ],
+        ['published_post_count']
+    )
+
+    stale_authors = [
+        ProfileStats(user_id=pk, post_count=total, published_post_count=count)
+        for pk, total, count in authors.annotate(
+            real_total=_post_count(Post.objects.all(), 'author'),
+            real_published=_post_count(published, 'author'),
+            stored_total=Coalesce('profile_stats__post_count', 0),
+            stored_published=Coalesce(
+                'profile_stats__published_post_count', 0
+            ),
+        ).exclude(
+            stored_total=F('real_total'),
+            stored_published=F('real_published'),
+        ).values_list('pk', 'real_total', 'real_published')
+    ]
+    existing = set(ProfileStats.objects.filter(
+        pk__in=[stats.user_id for stats in stale_authors]
+    ).values_list('pk', flat=True))
+    ProfileStats.objects.bulk_create(
+        [stats for stats in stale_authors if stats.user_id not in existing]
+    )
+    ProfileStats.objects.bulk_update(
+        [stats for stats in stale_authors if stats.user_id in existing],
+        ['post_count', 'published_post_count']
+    )
+
+    if stale_categories or stale_authors:
+        post_counts_changed.send(
+            sender=Post,
+            category_ids=[pk for pk, _ in stale_categories],
+            author_ids=[stats.user_id for stats in stale_authors],
+        )
+    return len(stale_categories), len(stale_authors)
@@ -8,7 +8,7 @@ class CommentForm(forms.ModelForm):
 
     class Meta:
         model = Comment
-        exclude = ('author', 'post')
+        exclude = ('author', 'post', 'is_published')
 
 
 class PostForm(forms.ModelForm):
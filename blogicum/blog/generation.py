@@ -0,0 +1,181 @@
+import itertools
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .cache import ALL_PAGES, invalidate_post_cards, purge_pages
+from .counters import reconcile_post_counts
+from .models import Category, Comment, Location, Post, User
+from .search import index_posts
+from .transfer import reset_sequences
+
+WORDS = (
+    'утро', 'город', 'дорога', 'река', 'лес', 'море', 'друг', 'кошка',
+    'собака', 'поезд', 'книга', 'письмо', 'обед', 'ужин', 'дождь',
+    'солнце', 'ветер', 'дом', 'сад', 'работа', 'отпуск', 'концерт',
+    'музей', 'вечер', 'зима', 'лето', 'осень', 'весна', 'гора', 'поле',
+    'старый', 'новый', 'тихий', 'шумный', 'долгий', 'быстрый', 'тёплый',
+    'холодный', 'гулял', 'читал', 'видел', 'слушал', 'думал', 'ждал',
+    'встретил', 'нашёл', 'потерял', 'вспомнил', 'решил', 'увидел',
+)
+DEFAULT_PASSWORD = 'blogicum'
+
+
+def _sentence(rnd, min_words, max_words):
+    words = rnd.choices(WORDS, k=rnd.randint(min_words, max_words))
+    return ' '.join(words).capitalize()
+
+
+def _next_pk(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def _bulk_create(model, objs, batch_size, after_batch=None):
+    """
+    Insert objects from an iterator batch by batch, without building
+    one big list first.
+    """
+    batch = []
+    for obj in itertools.chain(objs, [None]):
+        if obj is not None:
+            batch.append(obj)
+        if batch and (obj is None or len(batch) == batch_size):
+            model.objects.bulk_create(batch)
+            if after_batch is not None:
+                after_batch(batch)
+            batch = []
+
+
+def generate_blog_data(
+    users=10, categories=5, locations=10, posts=1000, comments=5000,
+    unpublished=0.05, future=0.02, days=365, seed=0, batch_size=1000,
+):
+    """
+    Fill the database with generated blog data. The same seed gives
+    the same data, with dates counted back from the current time.
+
+    Publication dates crowd towards the present, a share of posts is
+    unpublished or scheduled, and a few popular posts collect most of
+    the comments. Rows are written by bulk_create() with explicit ids,
+    comment counters are filled in directly, post counters are
+    recounted at the end, and no model signals are sent.
+    Return the number of created objects by model.
+    """
+    if (posts or comments) and not users:
+        raise ValueError(
+            'Для публикаций и комментариев нужен хотя бы один пользователь.'
+        )
+    if comments and not posts:
+        raise ValueError('Для комментариев нужна хотя бы одна публикация.')
+
+    rnd = random.Random(seed)
+    now = timezone.now()
+    password = make_password(DEFAULT_PASSWORD)
+    with transaction.atomic():
+        first_user = _next_pk(User)
+        _bulk_create(User, (
+            User(
+                pk=first_user + i,
+                username=f'user_{seed}_{first_user + i}',
+                password=password,
+            )
+            for i in range(users)
+        ), batch_size)
+        first_category = _next_pk(Category)
+        category_objs = [
+            Category(
+                pk=first_category + i,
+                title=_sentence(rnd, 1, 3),
+                description=_sentence(rnd, 5, 20),
+                slug=f'category-{seed}-{first_category + i}',
+                is_published=rnd.random() > 0.1,
+            )
+            for i in range(categories)
+        ]
+        _bulk_create(Category, category_objs, batch_size)
+        published_categories = {
+            category.pk for category in category_objs if category.is_published
+        }
+        first_location = _next_pk(Location)
+        _bulk_create(Location, (
+            Location(
+                pk=first_location + i,
+                name=_sentence(rnd, 1, 2),
+                is_published=rnd.random() > 0.1,
+            )
+            for i in range(locations)
+        ), batch_size)
+
+        # Pareto weights: a few posts get most of the comments.
+        first_post = _next_pk(Post)
+        weights = [rnd.paretovariate(1.2) for _ in range(posts)]
+        comment_posts = (
+            rnd.choices(range(posts), weights=weights, k=comments)
+            if posts else []
+        )
+        comment_counts = [0] * posts
+        for index in comment_posts:
+            comment_counts[index] += 1
+
+        def make_posts():
+            for i in range(posts):
+                if rnd.random() < future:
+                    pub_date = now + timedelta(days=days * rnd.random() / 10)
+                else:
+                    # Cubing the fraction makes recent dates more common.
+                    pub_date = now - timedelta(days=days * rnd.random() ** 3)
+                post = Post(
+                    pk=first_post + i,
+                    title=_sentence(rnd, 2, 6),
+                    text=' '.join(
+                        _sentence(rnd, 5, 15) + '.'
+                        for _ in range(rnd.randint(1, 8))
+                    ),
+                    pub_date=pub_date,
+                    is_published=rnd.random() >= unpublished,
+                    author_id=first_user + rnd.randrange(users),
+                    category_id=(
+                        first_category + rnd.randrange(categories)
+                        if categories else None
+                    ),
+                    location_id=(
+                        first_location + rnd.randrange(locations)
+                        if locations and rnd.random() < 0.7 else None
+                    ),
+                    comment_count=comment_counts[i],
+                )
+                post.is_visible = (
+                    post.is_published
+                    and post.category_id in published_categories
+                    and post.pub_date <= now
+                )
+                yield post
+
+        _bulk_create(Post, make_posts(), batch_size, index_posts)
+
+        _bulk_create(Comment, (
+            Comment(
+                text=_sentence(rnd, 3, 20),
+                post_id=first_post + index,
+                author_id=first_user + rnd.randrange(users),
+            )
+            for index in comment_posts
+        ), batch_size)
+        reset_sequences(
+            ('auth.user', 'blog.category', 'blog.location', 'blog.post')
+        )
+        reconcile_post_counts()
+
+    invalidate_post_cards()
+    purge_pages(ALL_PAGES)
+    return {
+        'users': users,
+        'categories': categories,
+        'locations': locations,
+        'posts': posts,
+        'comments': comments,
+    }
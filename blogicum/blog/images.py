@@ -0,0 +1,87 @@
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, JpegImagePlugin
+
+# Widths of the derivatives used by post cards, in pixels.
+IMAGE_VARIANT_WIDTHS = (320, 640)
+IMAGE_VARIANT_QUALITY = 80
+
+
+def variant_name(name, width):
+    """Return the storage name of the `width` derivative of `name`."""
+    return f'{os.path.splitext(name)[0]}_w{width}.jpg'
+
+
+def parse_variant_widths(variants):
+    return [int(width) for width in variants.split(',') if width]
+
+
+def delete_image_variants(storage, name, variants):
+    """Delete the derivatives of `name` listed in `variants`."""
+    for width in parse_variant_widths(variants):
+        storage.delete(variant_name(name, width))
+
+
+def _save_options(image):
+    """
+    Keep the quantization tables and subsampling of a JPEG, so that
+    saving it again does not lower its quality.
+    """
+    if image.format != 'JPEG':
+        return {}
+    return {
+        'qtables': image.quantization,
+        'subsampling': JpegImagePlugin.get_sampling(image),
+    }
+
+
+def strip_image_metadata(image):
+    """
+    Rotate the original according to its EXIF orientation and store
+    a copy without the EXIF block under a new name. The original is
+    kept: the caller deletes it once the post uses the copy. Images
+    without EXIF are left untouched. Return the storage name of the
+    image to use.
+    """
+    with image.open('rb') as original_file:
+        original = Image.open(original_file)
+        original.load()
+    if not original.getexif():
+        return image.name
+
+    fixed = ImageOps.exif_transpose(original)
+    fixed.info.pop('exif', None)
+    buffer = BytesIO()
+    fixed.save(buffer, original.format, **_save_options(original))
+    return image.storage.save(image.name, ContentFile(buffer.getvalue()))
+
+
+def generate_image_variants(image):
+    """
+    Store downscaled, recompressed JPEG copies of `image` next to the
+    original. Only widths smaller than the original are produced.
+    Return the comma-separated list of generated widths.
+    """
+    storage = image.storage
+    with image.open('rb') as original_file:
+        original = Image.open(original_file)
+        original.load()
+    original = original.convert('RGB')
+
+    widths = []
+    for width in IMAGE_VARIANT_WIDTHS:
+        if width >= original.width:
+            break
+        height = round(original.height * width / original.width)
+        buffer = BytesIO()
+        original.resize((width, height), Image.LANCZOS).save(
+            buffer, 'JPEG',
+            quality=IMAGE_VARIANT_QUALITY, optimize=True, progressive=True
+        )
+        name = variant_name(image.name, width)
+        storage.delete(name)
+        storage.save(name, ContentFile(buffer.getvalue()))
+        widths.append(width)
+    return ','.join(map(str, widths))
@@ -0,0 +1,166 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .cache import category_page_group, invalidate_post_card, purge_pages
+from .images import (
+    delete_image_variants, generate_image_variants, strip_image_metadata
+)
+from .models import ImageJob, ImageStatus, Post
+
+IMAGE_JOB_MAX_ATTEMPTS = 5
+# Seconds before the first retry; doubled after every failed attempt.
+IMAGE_JOB_RETRY_DELAY = 60
+# Seconds a claimed job may stay running. After that it is considered
+# abandoned by a crashed worker and can be claimed again.
+IMAGE_JOB_LEASE = 10 * 60
+
+
+def enqueue_image_job(post, replaced_image=''):
+    """
+    Queue processing of the current post image. Cards show the
+    original image until the job marks the post as ready. The
+    derivatives of `replaced_image` are deleted by the job when it
+    finishes, or after the commit if the image was removed.
+    """
+    pending = ImageJob.objects.filter(
+        post=post, status=ImageJob.Status.PENDING
+    )
+    if replaced_image and post.image_variants:
+        replaced = replaced_image, post.image_variants
+    else:
+        # A queued job never ran, so the derivatives it was to delete
+        # are still there.
+        replaced = pending.exclude(replaced_variants='').values_list(
+            'replaced_image', 'replaced_variants'
+        ).first() or ('', '')
+    status = ImageStatus.PENDING if post.image else ImageStatus.NONE
+    post.image_variants, post.image_status = '', status
+    Post.objects.filter(pk=post.pk).update(
+        image_variants='', image_status=status
+    )
+    pending.delete()
+    if post.image:
+        ImageJob.objects.create(
+            post=post, image_name=post.image.name,
+            replaced_image=replaced[0], replaced_variants=replaced[1],
+        )
+    elif replaced[1]:
+        transaction.on_commit(lambda: delete_image_variants(
+            post.image.storage, *replaced
+        ))
+
+
+def claimable_jobs(now, lease=IMAGE_JOB_LEASE):
+    """Return the due jobs and the running jobs whose lease expired."""
+    return ImageJob.objects.filter(
+        Q(status=ImageJob.Status.PENDING, run_after__lte=now)
+        | Q(
+            status=ImageJob.Status.RUNNING,
+            claimed_at__lt=now - timedelta(seconds=lease),
+        )
+    )
+
+
+def claim_image_jobs(limit, lease=IMAGE_JOB_LEASE):
+    """
+    Mark up to `limit` claimable jobs as running and return them. A
+    job is claimed by a conditional UPDATE that also renews its lease,
+    so concurrent workers never get the same job.
+    """
+    now = timezone.now()
+    due_ids = claimable_jobs(now, lease).values_list('pk', flat=True)[:limit]
+    claimed_ids = [
+        pk for pk in due_ids
+        if claimable_jobs(now, lease).filter(pk=pk).update(
+            status=ImageJob.Status.RUNNING,
+            claimed_at=now,
+            attempts=F('attempts') + 1,
+        )
+    ]
+    return ImageJob.objects.select_related(
+        'post', 'post__category'
+    ).filter(pk__in=claimed_ids)
+
+
+def fail_image_job(job, error, max_attempts=IMAGE_JOB_MAX_ATTEMPTS):
+    """Schedule a retry, or move the job to the dead letters."""
+    job.last_error = f'{type(error).__name__}: {error}'
+    if job.attempts >= max_attempts:
+        job.status = ImageJob.Status.FAILED
+        # A newer image of the post has its own job and status.
+        Post.objects.filter(pk=job.post_id, image=job.image_name).update(
+            image_status=ImageStatus.FAILED, updated_at=timezone.now()
+        )
+    else:
+        job.status = ImageJob.Status.PENDING
+        job.run_after = timezone.now() + timedelta(
+            seconds=IMAGE_JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+        )
+    job.save(update_fields=['status', 'run_after', 'last_error'])
+
+
+def process_image_job(job, max_attempts=IMAGE_JOB_MAX_ATTEMPTS):
+    """
+    Fix orientation, strip EXIF and build derivatives of the image.
+    Files are only deleted after the post has been switched away from
+    them, so a crash never loses the uploaded original.
+    """
+    if job.attempts > max_attempts:
+        # Reclaimed after the worker of the last attempt had crashed.
+        fail_image_job(job, TimeoutError('lease expired'), max_attempts)
+        return False
+    post = job.post
+    storage = post.image.storage
+    if post.image.name == job.image_name:
+        try:
+            post.image.name = strip_image_metadata(post.image)
+            post.image_variants = generate_image_variants(post.image)
+        except Exception as error:
+            if post.image.name != job.image_name:
+                storage.delete(post.image.name)
+            fail_image_job(job, error, max_attempts)
+            return False
+        # The conditional UPDATE matches nothing if a new image was
+        # uploaded meanwhile, so the result never replaces it.
+        switched = Post.objects.filter(
+            pk=post.pk, image=job.image_name
+        ).update(
+            image=post.image.name,
+            image_variants=post.image_variants,
+            image_status=ImageStatus.READY,
+            updated_at=timezone.now(),
+        )
+        if switched:
+            invalidate_post_card(post.pk)
+            purge_pages('index', *(
+                [category_page_group(post.category.slug)]
+                if post.category_id is not None else []
+            ))
+            stale_name = job.image_name
+        else:
+            stale_name = post.image.name
+            delete_image_variants(
+                storage, post.image.name, post.image_variants
+            )
+        if post.image.name != job.image_name:
+            storage.delete(stale_name)
+    delete_image_variants(
+        storage, job.replaced_image, job.replaced_variants
+    )
+    # A job for a replaced image is superseded by the newer one.
+    job.status = ImageJob.Status.DONE
+    job.save(update_fields=['status'])
+    return True
+
+
+def run_image_jobs(
+    limit, max_attempts=IMAGE_JOB_MAX_ATTEMPTS, lease=IMAGE_JOB_LEASE
+):
+    """Process one batch of due jobs. Return the number of them."""
+    jobs = claim_image_jobs(limit, lease)
+    for job in jobs:
+        process_image_job(job, max_attempts)
+    return len(jobs)
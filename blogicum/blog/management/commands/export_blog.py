@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.transfer import export_lines
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает пользователей, категории, местоположения, публикации '
+        'и комментарии в формате JSON Lines, по одному объекту в строке.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default='-',
+            help='Файл для выгрузки; по умолчанию стандартный вывод.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество объектов, читаемых за один запрос.'
+        )
+
+    def handle(self, *args, path, batch_size, **options):
+        started = time.perf_counter()
+        exported = 0
+        stream = (
+            self.stdout if path == '-'
+            else open(path, 'w', encoding='utf-8')
+        )
+        try:
+            for line in export_lines(batch_size):
+                stream.write(line)
+                exported += 1
+        finally:
+            if stream is not self.stdout:
+                stream.close()
+        elapsed = time.perf_counter() - started
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено объектов: {exported} за {elapsed:.2f} с '
+            f'({exported / max(elapsed, 1e-6):.0f} объектов/с).'
+        ))
@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.generation import generate_blog_data
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт синтетических пользователей, категории, местоположения, '
+        'публикации и комментарии пакетными вставками. При одинаковом '
+        '--seed данные совпадают.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default, help_text in (
+            ('users', 10, 'Количество пользователей.'),
+            ('categories', 5, 'Количество категорий.'),
+            ('locations', 10, 'Количество местоположений.'),
+            ('posts', 1000, 'Количество публикаций.'),
+            ('comments', 5000, 'Количество комментариев.'),
+            ('days', 365, 'За сколько дней распределить даты публикаций.'),
+            ('seed', 0, 'Начальное значение генератора случайных чисел.'),
+            ('batch-size', DEFAULT_BATCH_SIZE,
+             'Количество объектов в одной вставке.'),
+        ):
+            parser.add_argument(
+                f'--{name}', type=int, default=default, help=help_text
+            )
+        parser.add_argument(
+            '--unpublished',
+            type=float,
+            default=0.05,
+            help='Доля снятых с публикации записей.'
+        )
+        parser.add_argument(
+            '--future',
+            type=float,
+            default=0.02,
+            help='Доля отложенных публикаций.'
+        )
+
+    def handle(self, *args, **options):
+        options = {
+            name: options[name] for name in (
+                'users', 'categories', 'locations', 'posts', 'comments',
+                'unpublished', 'future', 'days', 'seed', 'batch_size',
+            )
+        }
+        started = time.perf_counter()
+        try:
+            created = generate_blog_data(**options)
+        except ValueError as error:
+            raise CommandError(error)
+        elapsed = time.perf_counter() - started
+        total = sum(created.values())
+        for name, count in created.items():
+            self.stdout.write(f'{name}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано объектов: {total} за {elapsed:.2f} с '
+            f'({total / max(elapsed, 1e-6):.0f} объектов/с).'
+        ))
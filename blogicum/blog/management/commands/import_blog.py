@@ -0,0 +1,72 @@
+import sys
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.cache import ALL_PAGES, invalidate_post_cards, purge_pages
+from blog.transfer import import_objects, read_objects, reset_sequences
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает данные блога из файла JSON Lines пакетными вставками '
+        'без сигналов моделей, затем обновляет видимость публикаций и '
+        'пересчитывает счётчики. Понимает и обычные фикстуры вроде '
+        'db.json.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл для загрузки; «-» — стандартный ввод.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество объектов одной модели в одной вставке.'
+        )
+
+    def handle(self, *args, path, batch_size, **options):
+        started = time.perf_counter()
+        stream = (
+            sys.stdin if path == '-' else open(path, encoding='utf-8')
+        )
+        try:
+            with transaction.atomic():
+                imported, skipped = import_objects(
+                    read_objects(stream), batch_size
+                )
+                reset_sequences(imported)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        elapsed = time.perf_counter() - started
+
+        if imported['blog.post'] or imported['blog.comment']:
+            call_command(
+                'recount_comments', batch_size=batch_size,
+                stdout=self.stdout
+            )
+        if imported['blog.post'] or imported['blog.category']:
+            call_command(
+                'publish_scheduled_posts', once=True, refresh=True,
+                stdout=self.stdout
+            )
+            call_command('reconcile_post_counts', stdout=self.stdout)
+        invalidate_post_cards()
+        purge_pages(ALL_PAGES)
+
+        for label, count in sorted(imported.items()):
+            self.stdout.write(f'{label}: {count}')
+        for label, count in sorted(skipped.items()):
+            self.stdout.write(f'{label}: {count} (пропущено)')
+        total = sum(imported.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено объектов: {total} за {elapsed:.2f} с '
+            f'({total / max(elapsed, 1e-6):.0f} объектов/с).'
+        ))
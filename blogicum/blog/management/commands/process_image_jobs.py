@@ -0,0 +1,110 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.jobs import (
+    IMAGE_JOB_LEASE, IMAGE_JOB_MAX_ATTEMPTS, enqueue_image_job, run_image_jobs
+)
+from blog.models import ImageJob, ImageStatus, Post
+
+DEFAULT_BATCH_SIZE = 10
+DEFAULT_SLEEP = 5
+
+
+class Command(BaseCommand):
+    help = (
+        'Обрабатывает очередь фото публикаций: поворот по EXIF, '
+        'удаление метаданных и создание уменьшенных копий.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обработать накопившиеся задачи и завершиться.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество задач, забираемых за один раз.'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=DEFAULT_SLEEP,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=IMAGE_JOB_MAX_ATTEMPTS,
+            help='Число попыток до переноса задачи в список ошибок.'
+        )
+        parser.add_argument(
+            '--lease',
+            type=int,
+            default=IMAGE_JOB_LEASE,
+            help=(
+                'Секунды, после которых незавершённую задачу может '
+                'забрать другой обработчик.'
+            )
+        )
+        parser.add_argument(
+            '--dead-letters',
+            action='store_true',
+            help='Показать задачи, исчерпавшие попытки, и завершиться.'
+        )
+        parser.add_argument(
+            '--retry-dead',
+            action='store_true',
+            help='Вернуть задачи, исчерпавшие попытки, в очередь.'
+        )
+        parser.add_argument(
+            '--enqueue-missing',
+            action='store_true',
+            help='Поставить в очередь фото, которые ещё не обрабатывались.'
+        )
+
+    def handle(self, *args, **options):
+        if options['dead_letters']:
+            return self.show_dead_letters()
+        if options['retry_dead']:
+            self.retry_dead_letters()
+        if options['enqueue_missing']:
+            self.enqueue_missing()
+
+        while True:
+            processed = run_image_jobs(
+                options['batch_size'], options['max_attempts'],
+                options['lease']
+            )
+            if processed:
+                self.stdout.write(f'Обработано задач: {processed}.')
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['sleep'])
+
+    def show_dead_letters(self):
+        for job in ImageJob.objects.filter(status=ImageJob.Status.FAILED):
+            self.stdout.write(
+                f'{job.pk}\t{job.post_id}\t{job.attempts}\t{job.last_error}'
+            )
+
+    def retry_dead_letters(self):
+        retried = ImageJob.objects.filter(
+            status=ImageJob.Status.FAILED
+        ).update(
+            status=ImageJob.Status.PENDING, attempts=0,
+            run_after=timezone.now()
+        )
+        self.stdout.write(f'Возвращено в очередь: {retried}.')
+
+    def enqueue_missing(self):
+        posts = Post.objects.exclude(image='').filter(
+            image_status=ImageStatus.NONE
+        )
+        for post in posts.only('image').iterator():
+            enqueue_image_job(post)
@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.models import Post
+from blog.publication import publish_due_posts, refresh_post_visibility
+
+DEFAULT_SLEEP = 60
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает отложенные публикации, дата публикации которых '
+        'наступила: ставит флаг is_visible, обновляет счётчики и '
+        'сбрасывает кэш страниц. Без --once работает постоянно и '
+        'просыпается к дате следующей отложенной публикации. '
+        'Должна работать рядом с сайтом: без неё отложенные '
+        'публикации не появляются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Показать наступившие публикации и завершиться.'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=DEFAULT_SLEEP,
+            help='Наибольшая пауза в секундах между проверками.'
+        )
+        parser.add_argument(
+            '--refresh',
+            action='store_true',
+            help=(
+                'Сначала сверить флаг is_visible всех публикаций, '
+                'например после загрузки данных.'
+            )
+        )
+
+    def handle(self, *args, once, sleep, refresh, **options):
+        if refresh:
+            changed = refresh_post_visibility()
+            self.stdout.write(f'Исправлено публикаций: {changed}.')
+
+        while True:
+            published = publish_due_posts()
+            if published:
+                self.stdout.write(f'Показано публикаций: {published}.')
+            if once:
+                break
+            time.sleep(self.get_pause(sleep))
+
+    def get_pause(self, sleep):
+        """Sleep until the next deferred post, but no longer than `sleep`."""
+        next_date = Post.objects.next_publication_date()
+        if next_date is None:
+            return sleep
+        seconds = (next_date - timezone.now()).total_seconds()
+        return min(sleep, max(seconds, 0))
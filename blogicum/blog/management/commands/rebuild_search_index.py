@@ -0,0 +1,74 @@
+import time
+from functools import reduce
+from operator import and_
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from blog.models import Post
+from blog.search import rebuild_search_index, search_backend, search_posts
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_REPEAT = 20
+
+
+def like_search(query):
+    """The search by LIKE scans that the index replaces."""
+    return Post.objects.published().filter(reduce(and_, (
+        Q(title__icontains=word) | Q(text__icontains=word)
+        for word in query.split()
+    )))
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново строит поисковый индекс публикаций. С параметром '
+        '--benchmark сравнивает поиск по индексу с поиском через LIKE.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество публикаций, читаемых за один запрос.'
+        )
+        parser.add_argument(
+            '--benchmark',
+            action='append',
+            default=[],
+            metavar='QUERY',
+            help='Поисковый запрос для замера; можно указать несколько раз.'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=DEFAULT_REPEAT,
+            help='Сколько раз выполнить каждый запрос при замере.'
+        )
+
+    def handle(self, *args, batch_size, benchmark, repeat, **options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            indexed = rebuild_search_index(batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано публикаций: {indexed} за '
+            f'{time.perf_counter() - started:.2f} с '
+            f'(индекс: {search_backend()}).'
+        ))
+        for query in benchmark:
+            self.compare(query, repeat)
+
+    def compare(self, query, repeat):
+        for name, search in (
+            ('индекс', search_posts),
+            ('LIKE', like_search),
+        ):
+            started = time.perf_counter()
+            for _ in range(repeat):
+                found = len(list(search(query)))
+            elapsed = (time.perf_counter() - started) / repeat * 1000
+            self.stdout.write(
+                f'«{query}», {name}: {elapsed:.2f} мс, найдено {found}'
+            )
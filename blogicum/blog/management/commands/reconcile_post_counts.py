@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.counters import reconcile_post_counts
+from blog.models import Category, Post, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет счётчики опубликованных публикаций категорий и авторов '
+        'с таблицей публикаций и исправляет расхождения. С '
+        '--since-minutes проверяются только недавно вышедшие публикации.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since-minutes',
+            type=int,
+            help=(
+                'Проверять только категории и авторов публикаций, '
+                'вышедших за последние N минут; по умолчанию проверяются '
+                'все. Берите N с запасом относительно периода запуска.'
+            )
+        )
+
+    def handle(self, *args, since_minutes, **options):
+        now = timezone.now()
+        categories = authors = None
+        if since_minutes is not None:
+            went_live = Post.objects.filter(
+                is_published=True,
+                pub_date__gt=now - timedelta(minutes=since_minutes),
+                pub_date__lte=now,
+            )
+            categories = Category.objects.filter(
+                pk__in=went_live.values('category_id')
+            )
+            authors = User.objects.filter(
+                pk__in=went_live.values('author_id')
+            )
+        fixed_categories, fixed_authors = reconcile_post_counts(
+            categories, authors
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено категорий: {fixed_categories}, '
+            f'авторов: {fixed_authors}.'
+        ))
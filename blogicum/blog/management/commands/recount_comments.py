@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from blog.counters import reconcile_comment_counts
+from blog.models import Post
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет поле comment_count публикаций с таблицей комментариев '
+        'и исправляет расхождения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество публикаций, проверяемых за один запрос.'
+        )
+
+    def handle(self, *args, batch_size, **options):
+        checked = fixed = 0
+        last_id = 0
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1]
+            checked += len(batch)
+            fixed += reconcile_comment_counts(
+                Post.objects.filter(pk__in=batch)
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено публикаций: {checked}, исправлено: {fixed}.'
+        ))
@@ -0,0 +1,244 @@
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.urls import URLResolver, get_resolver
+
+from .cache import incr_counter
+from .routers import get_replicas, routed_request
+
+logger = logging.getLogger('blog.queries')
+
+QUERY_STATS_METRICS = (
+    'requests', 'queries', 'db_time_us', 'duplicates', 'over_budget'
+)
+# Seconds the stats of a worker process are buffered before they are
+# added to the shared cache.
+DEFAULT_QUERY_STATS_FLUSH_SECONDS = 5
+# Stats name of requests that matched no URL pattern.
+UNRESOLVED_VIEW = 'unresolved'
+# The BLOG_QUERY_BUDGETS entry used for views without their own.
+DEFAULT_BUDGET_KEY = '*'
+# Holds the time until which the visitor reads from the primary
+# database after a write.
+STICKY_COOKIE_NAME = 'primary_until'
+DEFAULT_STICKY_SECONDS = 5
+
+
+class QueryCollector:
+    """
+    Execute wrapper counting the queries of one request, their total
+    time and the queries repeated with the same parameters.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[(sql, repr(params))] += 1
+
+    @property
+    def duplicates(self):
+        """Return the repeated statements with their repeat counts."""
+        return {
+            sql: count for (sql, _), count in self.statements.items()
+            if count > 1
+        }
+
+
+def _stats_key(view_name, metric):
+    return f'query_stats:{view_name}:{metric}'
+
+
+def get_view_names(patterns=None, namespace=''):
+    """Yield the names of the named URL patterns, with namespaces."""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from get_view_names(
+                pattern.url_patterns,
+                f'{namespace}{pattern.namespace}:'
+                if pattern.namespace else namespace
+            )
+        elif pattern.name:
+            yield namespace + pattern.name
+
+
+def _stats_keys():
+    views = sorted({*get_view_names(), UNRESOLVED_VIEW})
+    return views, [
+        _stats_key(view, metric)
+        for view in views for metric in QUERY_STATS_METRICS
+    ]
+
+
+class _PendingStats:
+    """Stats of this worker process not yet added to the cache."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals = Counter()
+        self.flushed_at = time.monotonic()
+
+
+_pending = _PendingStats()
+
+
+def record_query_stats(view_name, collector, duplicates, over_budget):
+    """
+    Add the queries of one request to the stats of its view. The
+    totals are buffered per process and flushed at most every
+    BLOG_QUERY_STATS_FLUSH_SECONDS, so most requests make no cache
+    round trip for monitoring.
+    """
+    flush_seconds = getattr(
+        settings, 'BLOG_QUERY_STATS_FLUSH_SECONDS',
+        DEFAULT_QUERY_STATS_FLUSH_SECONDS
+    )
+    with _pending.lock:
+        for metric, value in (
+            ('requests', 1),
+            ('queries', collector.count),
+            ('db_time_us', int(collector.duration * 1_000_000)),
+            ('duplicates', sum(count - 1 for count in duplicates.values())),
+            ('over_budget', int(over_budget)),
+        ):
+            if value:
+                _pending.totals[_stats_key(view_name, metric)] += value
+        due = time.monotonic() - _pending.flushed_at >= flush_seconds
+    if due:
+        flush_query_stats()
+
+
+def flush_query_stats():
+    """Add the buffered stats of this process to the shared cache."""
+    with _pending.lock:
+        totals, _pending.totals = _pending.totals, Counter()
+        _pending.flushed_at = time.monotonic()
+    for key, value in totals.items():
+        incr_counter(key, value)
+
+
+def get_query_stats():
+    """
+    Return the aggregated query stats of every named view that has
+    served requests. Views are listed from the URLconf, so workers
+    never register them in the cache.
+    """
+    flush_query_stats()
+    views, keys = _stats_keys()
+    values = cache.get_many(keys)
+    stats = {}
+    for view in views:
+        row = {
+            metric: values.get(_stats_key(view, metric), 0)
+            for metric in QUERY_STATS_METRICS
+        }
+        if not row['requests']:
+            continue
+        row['avg_queries'] = round(row['queries'] / row['requests'], 2)
+        row['avg_db_time_ms'] = round(
+            row['db_time_us'] / row['requests'] / 1000, 2
+        )
+        stats[view] = row
+    return stats
+
+
+def reset_query_stats():
+    with _pending.lock:
+        _pending.totals.clear()
+    cache.delete_many(_stats_keys()[1])
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Count the queries of every request on all database connections.
+
+    The totals go to the `Server-Timing` header and to the per-view
+    stats shown by `get_query_stats()`. Requests making more queries
+    than the BLOG_QUERY_BUDGETS entry of their view (or the '*' entry)
+    and requests repeating a query with the same parameters are
+    logged to `blog.queries`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        collector = QueryCollector()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(collector))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        match = request.resolver_match
+        view_name = match.view_name if match else UNRESOLVED_VIEW
+        budgets = getattr(settings, 'BLOG_QUERY_BUDGETS', {})
+        budget = budgets.get(view_name, budgets.get(DEFAULT_BUDGET_KEY))
+        over_budget = budget is not None and collector.count > budget
+        if over_budget:
+            logger.warning(
+                '%s %s: %d queries, budget %d', view_name,
+                request.path, collector.count, budget
+            )
+        duplicates = collector.duplicates
+        if duplicates:
+            logger.warning(
+                '%s %s: repeated queries: %s', view_name, request.path,
+                '; '.join(
+                    f'{count}x {sql}' for sql, count in duplicates.items()
+                )
+            )
+        record_query_stats(view_name, collector, duplicates, over_budget)
+
+        response['Server-Timing'] = (
+            f'db;dur={collector.duration * 1000:.1f};'
+            f'desc="{collector.count} queries", '
+            f'total;dur={total * 1000:.1f}'
+        )
+        return response
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Pin the requests of a visitor to the primary database for
+    REPLICA_STICKY_SECONDS after a request of theirs wrote to it, so
+    that authors see their new posts and comments despite replication
+    lag. Does nothing unless DATABASE_REPLICAS are configured.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            pinned_until = float(request.COOKIES.get(STICKY_COOKIE_NAME, 0))
+        except ValueError:
+            pinned_until = 0
+        with routed_request(pinned=pinned_until > time.time()) as routing:
+            response = self.get_response(request)
+        if routing.wrote and get_replicas():
+            seconds = getattr(
+                settings, 'REPLICA_STICKY_SECONDS', DEFAULT_STICKY_SECONDS
+            )
+            response.set_cookie(
+                STICKY_COOKIE_NAME, str(time.time() + seconds),
+                max_age=seconds, httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-17 06:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_post_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.CharField(blank=True, editable=False, help_text='Ширины сгенерированных копий через запятую.', max_length=64, verbose_name='Уменьшенные копии фото'),
+        ),
+    ]
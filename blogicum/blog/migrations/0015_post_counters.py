@@ -0,0 +1,68 @@
+# Generated by Django 3.2.16 on 2026-10-17 06:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+def fill_post_counters(apps, schema_editor):
+    """Count the posts already in the database."""
+    Category = apps.get_model('blog', 'Category')
+    Post = apps.get_model('blog', 'Post')
+    ProfileStats = apps.get_model('blog', 'ProfileStats')
+    published = Post.objects.filter(
+        is_published=True,
+        category__is_published=True,
+        pub_date__lte=timezone.now(),
+    ).order_by()
+    by_category = dict(
+        published.values_list('category_id').annotate(models.Count('pk'))
+    )
+    Category.objects.bulk_update(
+        [
+            Category(pk=pk, published_post_count=count)
+            for pk, count in by_category.items()
+        ],
+        ['published_post_count']
+    )
+    by_author = dict(
+        published.values_list('author_id').annotate(models.Count('pk'))
+    )
+    ProfileStats.objects.bulk_create([
+        ProfileStats(
+            user_id=author_id,
+            post_count=count,
+            published_post_count=by_author.get(author_id, 0),
+        )
+        for author_id, count in Post.objects.order_by()
+        .values_list('author_id').annotate(models.Count('pk'))
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('blog', '0014_comment_is_published'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='profile_stats', serialize=False, to='auth.user', verbose_name='Автор')),
+                ('post_count', models.IntegerField(default=0, verbose_name='Всего публикаций')),
+                ('published_post_count', models.IntegerField(default=0, verbose_name='Опубликованных публикаций')),
+            ],
+            options={
+                'verbose_name': 'статистика автора',
+                'verbose_name_plural': 'Статистика авторов',
+            },
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='published_post_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Опубликованных публикаций'),
+        ),
+        migrations.RunPython(fill_post_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.16 on 2026-10-17 07:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0018_post_comment_count_editable'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagejob',
+            name='replaced_image',
+            field=models.CharField(blank=True, max_length=256, verbose_name='Заменённое фото'),
+        ),
+        migrations.AddField(
+            model_name='imagejob',
+            name='replaced_variants',
+            field=models.CharField(blank=True, help_text='Удаляются, когда задача завершена.', max_length=64, verbose_name='Копии заменённого фото'),
+        ),
+    ]
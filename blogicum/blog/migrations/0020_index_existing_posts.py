@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def index_existing_posts(apps, schema_editor):
+    """Fill the search index with the posts written before it existed."""
+    from blog.search import rebuild_search_index
+
+    rebuild_search_index(
+        using=schema_editor.connection.alias,
+        post_model=apps.get_model('blog', 'Post'),
+        term_model=apps.get_model('blog', 'PostSearchTerm'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0019_imagejob_replaced_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            index_existing_posts, migrations.RunPython.noop
+        ),
+    ]
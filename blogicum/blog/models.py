@@ -1,9 +1,21 @@
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Substr
+from django.utils import timezone
+
+from .images import parse_variant_widths, variant_name
 
 User = get_user_model()
 
+# Enough characters to cover the `truncatewords` preview in post cards.
+POST_PREVIEW_LENGTH = 500
+# Post fields the materialized `is_visible` flag depends on.
+POST_VISIBILITY_FIELDS = {
+    'is_published', 'pub_date', 'category', 'category_id'
+}
+
 
 class PublishedModel(models.Model):
     """
@@ -43,11 +55,33 @@ class Category(PublishedModel):
             'разрешены символы латиницы, цифры, дефис и подчёркивание.'
         )
     )
+    # Maintained by blog.signals and `reconcile_post_counts`.
+    published_post_count = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Опубликованных публикаций'
+    )
 
     class Meta:
         verbose_name = 'категория'
         verbose_name_plural = 'Категории'
 
+    def save(self, *args, **kwargs):
+        # Like Post.comment_count, the counter must not be written
+        # back from a stale instance.
+        if (
+            self.pk is not None
+            and not self._state.adding
+            and kwargs.get('update_fields') is None
+        ):
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname != 'published_post_count'
+                and field.attname not in self.get_deferred_fields()
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.title[:50]
 
@@ -65,6 +99,89 @@ class Location(PublishedModel):
         return self.name[:50]
 
 
+class ImageStatus(models.IntegerChoices):
+    """Processing state of a post image."""
+
+    NONE = 0, 'Нет фото'
+    PENDING = 1, 'В очереди'
+    READY = 2, 'Готово'
+    FAILED = 3, 'Ошибка'
+
+
+class PostQuerySet(models.QuerySet):
+    """Query helpers shared by every view that lists posts."""
+
+    @staticmethod
+    def published_q(now=None):
+        """
+        Return the publication rule: published, with a published
+        category and a publication date that has already come.
+        """
+        return models.Q(
+            is_published=True,
+            category__is_published=True,
+            pub_date__lte=now or timezone.now(),
+        )
+
+    def published(self):
+        """
+        Keep only the posts visible to readers, by the materialized
+        `is_visible` flag. Deferred posts get the flag from
+        `blog.publication` when their time comes, so a deployment must
+        run `publish_scheduled_posts`; until it does, they stay hidden.
+        To apply the rule at a given moment instead, filter by
+        `published_q(now)`.
+        """
+        return self.filter(is_visible=True)
+
+    def visible_to(self, user):
+        """Keep the published posts and every post written by `user`."""
+        if not user.is_authenticated:
+            return self.published()
+        return self.filter(models.Q(is_visible=True) | models.Q(author=user))
+
+    def next_publication_date(self, now=None):
+        """Return the closest publication date still in the future."""
+        return self.filter(
+            is_published=True, pub_date__gt=now or timezone.now()
+        ).aggregate(next_date=models.Min('pub_date'))['next_date']
+
+    def next_visibility_date(self):
+        """
+        Return the publication date of the earliest post waiting for
+        `publish_scheduled_posts` to show it. The date may have passed
+        already if the command has not run yet.
+        """
+        return self.filter(
+            is_published=True, is_visible=False, category__is_published=True
+        ).aggregate(next_date=models.Min('pub_date'))['next_date']
+
+    def delete(self):
+        """Delete the posts without updating the counters they lose."""
+        from .counters import post_deletion
+
+        with post_deletion(self.values_list('pk', flat=True)):
+            return super().delete()
+
+    def for_feed(self):
+        """
+        Join author, category and location in one query and load
+        only the columns rendered by a post card. The full text
+        is replaced with a short `text_preview` prefix.
+        """
+        return self.select_related(
+            'author', 'category', 'location'
+        ).only(
+            'title', 'pub_date', 'image', 'image_variants', 'image_status',
+            'is_published', 'comment_count', 'updated_at',
+            'author__username',
+            'category__title', 'category__slug', 'category__is_published',
+            'location__name', 'location__is_published',
+        ).annotate(
+            text_preview=Substr('text', 1, POST_PREVIEW_LENGTH)
+        )
+
+
 class Post(PublishedModel):
     """
     Create a table of posts with the fields title,
@@ -87,7 +204,34 @@ class Post(PublishedModel):
         upload_to='post_images',
         blank=True
     )
-    comment_count = models.IntegerField(default=0)
+    image_variants = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        verbose_name='Уменьшенные копии фото',
+        help_text='Ширины сгенерированных копий через запятую.'
+    )
+    image_status = models.PositiveSmallIntegerField(
+        choices=ImageStatus.choices,
+        default=ImageStatus.NONE,
+        editable=False,
+        verbose_name='Обработка фото'
+    )
+    comment_count = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Комментариев'
+    )
+    is_visible = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Видна читателям',
+        help_text=(
+            'Опубликована, в опубликованной категории, и дата публикации '
+            'наступила.'
+        )
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Изменено')
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -107,21 +251,154 @@ class Post(PublishedModel):
         verbose_name='Категория'
     )
 
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         default_related_name = 'posts'
         ordering = ('-pub_date',)
+        indexes = (
+            # Main feed: visible posts, newest first. Backends
+            # without partial indexes skip it.
+            models.Index(
+                fields=('-pub_date', '-id'),
+                condition=models.Q(is_visible=True),
+                name='post_visible_feed_idx'
+            ),
+            # Deferred posts waiting for `publish_due_posts()`.
+            models.Index(
+                fields=('pub_date',),
+                condition=models.Q(is_published=True, is_visible=False),
+                name='post_scheduled_idx'
+            ),
+            # Category and profile pages.
+            models.Index(
+                fields=('category', '-pub_date'),
+                name='post_category_pub_date_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='post_author_pub_date_idx'
+            ),
+            # Admin ordering and date hierarchy over all posts.
+            models.Index(fields=('pub_date',), name='post_pub_date_idx'),
+        )
 
-    # you override the save method and calculate for opening
     def save(self, *args, **kwargs):
-        # self.comment_count =
+        # comment_count is maintained by atomic UPDATEs in blog.signals,
+        # so saving an existing post must not write back a stale value.
+        if (
+            self.pk is not None
+            and not self._state.adding
+            and kwargs.get('update_fields') is None
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname != 'comment_count'
+                and field.attname not in deferred
+            ]
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or (
+            POST_VISIBILITY_FIELDS & set(update_fields)
+        ):
+            self.is_visible = self.get_is_visible()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'is_visible'}
         super(Post, self).save(*args, **kwargs)
 
+    def delete(self, *args, **kwargs):
+        # Comments removed by the cascade must not touch the counter
+        # of the post that is being deleted.
+        from .counters import post_deletion
+
+        with post_deletion([self.pk]):
+            return super().delete(*args, **kwargs)
+
+    def get_is_visible(self, now=None):
+        """Apply the publication rule of `published_q()` to the post."""
+        return bool(
+            self.is_published
+            and self.category_id is not None
+            and self.category.is_published
+            and self.pub_date <= (now or timezone.now())
+        )
+
+    def image_variant_urls(self):
+        """
+        Return `(width, url)` pairs of the stored image derivatives.
+        Until the background job has processed the image there are
+        none, and cards fall back to the original.
+        """
+        if self.image_status != ImageStatus.READY:
+            return []
+        storage = self.image.storage
+        return [
+            (width, storage.url(variant_name(self.image.name, width)))
+            for width in parse_variant_widths(self.image_variants)
+        ]
+
+    @property
+    def thumbnail_url(self):
+        """URL of the largest derivative, or of the original image."""
+        variants = self.image_variant_urls()
+        return variants[-1][1] if variants else self.image.url
+
+    @property
+    def image_srcset(self):
+        return ', '.join(
+            f'{url} {width}w' for width, url in self.image_variant_urls()
+        )
+
     def __str__(self):
         return self.title[:50]
 
 
+class CommentQuerySet(models.QuerySet):
+    def counts_by_post(self):
+        """Map post ids to the number of their comments in one query."""
+        return dict(
+            self.order_by()
+            .values_list('post_id')
+            .annotate(count=models.Count('pk'))
+        )
+
+    def delete(self):
+        """
+        Delete the comments and shift the counters of their posts
+        with a single UPDATE instead of one per deleted comment.
+        """
+        from .counters import adjust_comment_counts, suspend_comment_counter
+
+        with transaction.atomic(using=self.db), suspend_comment_counter():
+            deleted = self.filter(is_published=True).counts_by_post()
+            result = super().delete()
+            adjust_comment_counts(
+                {post_id: -count for post_id, count in deleted.items()}
+            )
+        return result
+
+    def set_published(self, is_published):
+        """
+        Show or hide the comments and shift the counters of their
+        posts in one UPDATE. Return the number of changed comments.
+        """
+        from .counters import adjust_comment_counts
+
+        sign = 1 if is_published else -1
+        with transaction.atomic(using=self.db):
+            changed = self.exclude(is_published=is_published)
+            deltas = {
+                post_id: sign * count
+                for post_id, count in changed.counts_by_post().items()
+            }
+            updated = changed.update(is_published=is_published)
+            adjust_comment_counts(deltas)
+        return updated
+
+
 class Comment(models.Model):
     """Create a comment table."""
 
@@ -141,11 +418,144 @@ class Comment(models.Model):
         verbose_name='Публикация',
         related_name='comments',
     )
+    is_published = models.BooleanField(
+        default=True,
+        verbose_name='Опубликовано',
+        help_text='Снимите галочку, чтобы скрыть комментарий.'
+    )
+
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_at_idx'
+            ),
+        )
 
     def __str__(self):
         return f'Комментарий №{self.pk} от {self.created_at}'
+
+
+class ImageJob(models.Model):
+    """A queued background processing of a post image."""
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        DONE = 'done', 'Выполнено'
+        FAILED = 'failed', 'Не выполнено'
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        verbose_name='Публикация',
+        related_name='image_jobs'
+    )
+    image_name = models.CharField(max_length=256, verbose_name='Фото')
+    replaced_image = models.CharField(
+        max_length=256,
+        blank=True,
+        verbose_name='Заменённое фото'
+    )
+    replaced_variants = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name='Копии заменённого фото',
+        help_text='Удаляются, когда задача завершена.'
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попытки'
+    )
+    run_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Не раньше'
+    )
+    claimed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Взята в работу'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Ошибка')
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Добавлено'
+    )
+
+    class Meta:
+        verbose_name = 'обработка фото'
+        verbose_name_plural = 'Обработка фото'
+        ordering = ('run_after',)
+        indexes = (
+            models.Index(
+                fields=('status', 'run_after'),
+                name='imagejob_status_run_after_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'Обработка фото публикации №{self.post_id}'
+
+
+class PostSearchTerm(models.Model):
+    """A stemmed term of a post in the portable search index."""
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        verbose_name='Публикация',
+        related_name='search_terms'
+    )
+    term = models.CharField(max_length=64, verbose_name='Термин')
+    weight = models.PositiveIntegerField(default=1, verbose_name='Вес')
+
+    class Meta:
+        verbose_name = 'поисковый термин'
+        verbose_name_plural = 'Поисковые термины'
+        indexes = (
+            models.Index(
+                fields=('term', 'post'),
+                name='postsearchterm_term_post_idx'
+            ),
+        )
+
+    def __str__(self):
+        return self.term
+
+
+class ProfileStats(models.Model):
+    """Stored post counters of an author shown on the profile page."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name='Автор',
+        related_name='profile_stats'
+    )
+    post_count = models.IntegerField(
+        default=0,
+        verbose_name='Всего публикаций'
+    )
+    published_post_count = models.IntegerField(
+        default=0,
+        verbose_name='Опубликованных публикаций'
+    )
+
+    class Meta:
+        verbose_name = 'статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return f'Статистика автора №{self.user_id}'
@@ -0,0 +1,172 @@
+import base64
+import binascii
+from collections.abc import Sequence
+
+from django.core.paginator import InvalidPage, Paginator
+from django.db import connections
+from django.db.models import Max, Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+FORWARD = 'n'
+BACKWARD = 'p'
+# Tables estimated to be smaller than this are counted exactly.
+APPROXIMATE_COUNT_THRESHOLD = 10000
+
+
+class CursorPage(Sequence):
+    """A page of posts fetched by `CursorPaginator`."""
+
+    def __init__(self, object_list, next_cursor, previous_cursor, paginator):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.paginator = paginator
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Keyset pagination over `(pub_date, id)`, newest first.
+
+    Every page is fetched with an indexed range condition instead of
+    OFFSET, and no COUNT(*) is issued, so the cost of a page does not
+    depend on how deep it is.
+    """
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    @staticmethod
+    def encode_cursor(direction, post):
+        raw = f'{direction}{post.pub_date.isoformat()}|{post.pk}'
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            direction, raw = raw[0], raw[1:]
+            pub_date, pk = raw.rsplit('|', 1)
+            pub_date, pk = parse_datetime(pub_date), int(pk)
+        except (binascii.Error, UnicodeError, ValueError, IndexError):
+            raise InvalidPage('Неверный курсор страницы.')
+        if direction not in (FORWARD, BACKWARD) or pub_date is None:
+            raise InvalidPage('Неверный курсор страницы.')
+        return direction, pub_date, pk
+
+    def page(self, cursor=''):
+        """Return the page that starts right after `cursor`."""
+        queryset = self.queryset.order_by('-pub_date', '-pk')
+        direction = FORWARD
+        if cursor:
+            direction, pub_date, pk = self.decode_cursor(cursor)
+            if direction == FORWARD:
+                queryset = queryset.filter(
+                    Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+                ).reverse()
+
+        posts = list(queryset[:self.per_page + 1])
+        has_more = len(posts) > self.per_page
+        posts = posts[:self.per_page]
+        if direction == BACKWARD:
+            posts.reverse()
+        has_next = has_more if direction == FORWARD else True
+        has_previous = bool(cursor) if direction == FORWARD else has_more
+
+        return CursorPage(
+            posts,
+            next_cursor=(
+                self.encode_cursor(FORWARD, posts[-1])
+                if posts and has_next else None
+            ),
+            previous_cursor=(
+                self.encode_cursor(BACKWARD, posts[0])
+                if posts and has_previous else None
+            ),
+            paginator=self,
+        )
+
+
+def estimate_row_count(queryset):
+    """
+    Return a cheap estimate of the number of rows in the queryset's
+    table: planner statistics on PostgreSQL and MySQL, the largest
+    primary key elsewhere.
+    """
+    model = queryset.model
+    connection = connections[queryset.db]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [table]
+            )
+            row = cursor.fetchone()
+            return row[0] if row and row[0] >= 0 else None
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables '
+                'WHERE table_schema = DATABASE() AND table_name = %s',
+                [table]
+            )
+            row = cursor.fetchone()
+            return row[0] if row else None
+    return model._default_manager.using(queryset.db).aggregate(
+        last=Max('pk')
+    )['last'] or 0
+
+
+class ApproximateCountPaginator(Paginator):
+    """
+    Paginator that skips the exact COUNT(*) of large unfiltered tables
+    and uses `estimate_row_count()` instead. Filtered querysets are
+    still counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if getattr(queryset, 'query', None) is None or queryset.query.where:
+            return super().count
+        estimate = estimate_row_count(queryset)
+        if estimate is None or estimate < APPROXIMATE_COUNT_THRESHOLD:
+            return super().count
+        return estimate
+
+
+class PrecountedPaginator(Paginator):
+    """
+    Paginator that takes the number of objects from a stored counter
+    when one is passed as `count`, instead of running COUNT(*).
+    """
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+    @cached_property
+    def count(self):
+        if self._count is None:
+            return super().count
+        return self._count
@@ -0,0 +1,79 @@
+from collections import Counter
+
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .counters import shift_post_counts
+from .models import Post
+
+# Sent with `category_ids` of the posts whose `is_visible` flag was
+# changed in bulk, e.g. when deferred posts go live.
+post_visibility_changed = Signal()
+
+
+def _set_visibility(posts, is_visible):
+    """
+    Set `is_visible` of the posts that differ and return the number
+    of changed posts by author and by category.
+    """
+    changing = posts.exclude(is_visible=is_visible)
+    authors, categories = Counter(), Counter()
+    for author_id, category_id in changing.values_list(
+        'author_id', 'category_id'
+    ).iterator():
+        authors[author_id] += 1
+        categories[category_id] += 1
+    if authors:
+        changing.update(is_visible=is_visible)
+    return authors, categories
+
+
+def _difference(added, removed):
+    return {key: added[key] - removed[key] for key in {*added, *removed}}
+
+
+def refresh_post_visibility(posts=None, now=None):
+    """
+    Bring the materialized `is_visible` flag of the posts (all by
+    default) in line with the publication rule at the moment `now`.
+    Stored post counters follow, and `post_visibility_changed` is
+    sent so cached pages are purged. Return the number of changed
+    posts.
+    """
+    now = now or timezone.now()
+    if posts is None:
+        posts = Post.objects.all()
+    rule = Post.objects.published_q(now)
+    with transaction.atomic():
+        shown_authors, shown_categories = _set_visibility(
+            posts.filter(rule), True
+        )
+        hidden_authors, hidden_categories = _set_visibility(
+            posts.exclude(rule), False
+        )
+        shift_post_counts(
+            _difference(shown_categories, hidden_categories),
+            _difference(shown_authors, hidden_authors),
+        )
+    changed = sum(shown_authors.values()) + sum(hidden_authors.values())
+    category_ids = {*shown_categories, *hidden_categories} - {None}
+    if changed:
+        post_visibility_changed.send(
+            sender=Post, category_ids=sorted(category_ids)
+        )
+    return changed
+
+
+def publish_due_posts(now=None):
+    """
+    Show the deferred posts whose publication date has come by the
+    moment `now`. Return the number of posts that went live.
+    """
+    now = now or timezone.now()
+    return refresh_post_visibility(
+        Post.objects.filter(
+            is_published=True, is_visible=False, pub_date__lte=now
+        ),
+        now
+    )
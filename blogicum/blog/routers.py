@@ -0,0 +1,74 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+class _RoutingState(threading.local):
+    """Per-thread routing flags of the current request."""
+
+    def __init__(self):
+        self.replica_reads = 0
+        self.pinned = False
+        self.wrote = False
+
+
+_state = _RoutingState()
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+@contextmanager
+def replica_reads():
+    """Let reads inside the block go to a replica, if there is one."""
+    _state.replica_reads += 1
+    try:
+        yield
+    finally:
+        _state.replica_reads -= 1
+
+
+@contextmanager
+def routed_request(pinned=False):
+    """
+    Track the routing of one request. A pinned request reads from the
+    primary even inside `replica_reads()` blocks. The yielded state
+    tells afterwards whether the request wrote to the database.
+    """
+    _state.pinned, _state.wrote = pinned, False
+    try:
+        yield _state
+    finally:
+        _state.pinned = False
+
+
+class ReplicaRouter:
+    """
+    Send reads to a random DATABASE_REPLICAS alias inside
+    `replica_reads()` blocks, unless the request is pinned to the
+    primary by a recent write. Everything else uses the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if replicas and _state.replica_reads and not _state.pinned:
+            return random.choice(replicas)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema from the primary.
+        return db not in get_replicas()
@@ -0,0 +1,255 @@
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+
+from .models import Post, PostSearchTerm
+
+FTS_TABLE = 'blog_post_search'
+# Title matches weigh more than matches in the text.
+TITLE_WEIGHT = 3
+MAX_TERM_LENGTH = 64
+
+_WORD_RE = re.compile(r'\w+')
+_VOWELS = 'аеиоуыэюя'
+
+STOP_WORDS = frozenset((
+    'а', 'без', 'бы', 'в', 'во', 'все', 'вы', 'да', 'для', 'до', 'его',
+    'ее', 'же', 'за', 'и', 'из', 'или', 'их', 'к', 'как', 'ко', 'ли',
+    'мы', 'на', 'над', 'не', 'нет', 'ни', 'но', 'о', 'об', 'он', 'она',
+    'они', 'оно', 'от', 'по', 'под', 'при', 'с', 'со', 'так', 'то',
+    'про', 'ты', 'у', 'что', 'это', 'я',
+))
+
+
+def _endings(*endings):
+    return sorted(endings, key=len, reverse=True)
+
+
+_PERFECTIVE_GERUND = _endings(
+    'вшись', 'ившись', 'ывшись', 'вши', 'ивши', 'ывши', 'в', 'ив', 'ыв'
+)
+_REFLEXIVE = _endings('ся', 'сь')
+_ADJECTIVAL = _endings(
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+    'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+    'ая', 'яя', 'ою', 'ею',
+    'ующий', 'ующая', 'ующее', 'ующие', 'ующего', 'ующей', 'ующих',
+    'ившего', 'ывшего', 'вшего', 'нного', 'нный', 'нная', 'нное', 'нные',
+)
+_VERB = _endings(
+    'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+    'ют', 'ны', 'ть', 'ешь', 'нно', 'ила', 'ыла', 'ена', 'ейте', 'уйте',
+    'ите', 'или', 'ыли', 'ей', 'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило',
+    'ыло', 'ено', 'ят', 'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть',
+    'ишь', 'ую', 'ю',
+)
+_NOUN = _endings(
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+    'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+    'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+    'ья', 'я',
+)
+_SUPERLATIVE = _endings('ейше', 'ейш')
+
+
+def _strip(word, start, endings):
+    """Remove the longest of `endings` found after position `start`."""
+    for ending in endings:
+        if word.endswith(ending) and len(word) - len(ending) >= start:
+            return word[:-len(ending)], True
+    return word, False
+
+
+def stem(word):
+    """
+    Reduce a Russian word to its stem with a simplified Snowball
+    algorithm. Words in other scripts are returned unchanged.
+    """
+    word = word.lower().replace('ё', 'е')
+    rv = next(
+        (i + 1 for i, letter in enumerate(word) if letter in _VOWELS), None
+    )
+    if rv is None or rv >= len(word):
+        return word
+
+    word, found = _strip(word, rv, _PERFECTIVE_GERUND)
+    if not found:
+        word, _ = _strip(word, rv, _REFLEXIVE)
+        for endings in (_ADJECTIVAL, _VERB, _NOUN):
+            word, found = _strip(word, rv, endings)
+            if found:
+                break
+    word, _ = _strip(word, rv, ('и',))
+    word, _ = _strip(word, rv, _SUPERLATIVE)
+    if word.endswith('нн'):
+        word = word[:-1]
+    word, _ = _strip(word, rv, ('ь',))
+    return word
+
+
+def tokenize(text):
+    """Split `text` into stemmed search terms without stop words."""
+    return [
+        stem(word)[:MAX_TERM_LENGTH] for word in _WORD_RE.findall(text.lower())
+        if word not in STOP_WORDS
+    ]
+
+
+def search_backend(using=DEFAULT_DB_ALIAS):
+    """
+    Return 'fts5' when posts in the `using` database are indexed by
+    an SQLite FTS5 table and 'terms' for the portable inverted index.
+    The BLOG_SEARCH_BACKEND setting forces one of them.
+    """
+    backend = getattr(settings, 'BLOG_SEARCH_BACKEND', None)
+    if backend:
+        return backend
+    connection = connections[using]
+    # The index table does not come and go at runtime, so the lookup
+    # is done once per connection.
+    backend = getattr(connection, '_blog_search_backend', None)
+    if backend is None:
+        has_fts = (
+            connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+        backend = 'fts5' if has_fts else 'terms'
+        connection._blog_search_backend = backend
+    return backend
+
+
+def _post_terms(post):
+    """Return the title and text terms of the post."""
+    return tokenize(post.title), tokenize(post.text)
+
+
+def _index_db(using):
+    return using or router.db_for_write(PostSearchTerm)
+
+
+def index_posts(posts, using=None, term_model=PostSearchTerm):
+    """Add the posts to the search index or refresh their entries."""
+    posts = list(posts)
+    if not posts:
+        return
+    ids = [post.pk for post in posts]
+    using = _index_db(using)
+    if search_backend(using) == 'fts5':
+        rows = []
+        for post in posts:
+            title, text = _post_terms(post)
+            rows.append((post.pk, ' '.join(title), ' '.join(text)))
+        with connections[using].cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [(post_id,) for post_id in ids]
+            )
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, text) '
+                'VALUES (%s, %s, %s)',
+                rows
+            )
+        return
+
+    entries = []
+    for post in posts:
+        title, text = _post_terms(post)
+        weights = Counter(text)
+        for term in title:
+            weights[term] += TITLE_WEIGHT
+        entries.extend(
+            term_model(post_id=post.pk, term=term, weight=weight)
+            for term, weight in weights.items()
+        )
+    terms = term_model.objects.using(using)
+    terms.filter(post_id__in=ids).delete()
+    terms.bulk_create(entries, batch_size=1000)
+
+
+def index_post(post):
+    """Add the post to the search index or refresh its entry."""
+    index_posts([post])
+
+
+def unindex_post(post_id):
+    """Remove the post from the search index."""
+    using = _index_db(None)
+    if search_backend(using) == 'fts5':
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+    else:
+        PostSearchTerm.objects.using(using).filter(post_id=post_id).delete()
+
+
+def search_posts(query, posts=None):
+    """
+    Return the posts matching every term of `query`, best matches
+    first. Only published posts are searched unless another `posts`
+    queryset is given.
+    """
+    if posts is None:
+        posts = Post.objects.published()
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return posts.none()
+
+    # Reads may be routed to a replica, which is checked on its own.
+    if search_backend(posts.db) == 'fts5':
+        match = ' '.join(
+            '"{}"'.format(term.replace('"', '""')) for term in terms
+        )
+        return posts.extra(
+            tables=[FTS_TABLE],
+            where=[
+                f'{FTS_TABLE}.rowid = blog_post.id',
+                f'{FTS_TABLE} MATCH %s',
+            ],
+            params=[match],
+            select={'rank': f'bm25({FTS_TABLE}, {TITLE_WEIGHT}.0, 1.0)'},
+            order_by=['rank', '-pub_date'],
+        )
+
+    matches = PostSearchTerm.objects.filter(
+        term__in=terms, post=OuterRef('pk')
+    ).order_by().values('post')
+    return posts.annotate(
+        matched_terms=Subquery(
+            matches.annotate(count=Count('pk')).values('count'),
+            output_field=IntegerField()
+        ),
+        rank=Subquery(
+            matches.annotate(score=Sum('weight')).values('score'),
+            output_field=IntegerField()
+        ),
+    ).filter(matched_terms=len(terms)).order_by('-rank', '-pub_date')
+
+
+def rebuild_search_index(
+    batch_size=1000, using=None, post_model=Post, term_model=PostSearchTerm
+):
+    """
+    Index every post again. Return the number of indexed posts.
+    Migrations pass their historical models.
+    """
+    using = _index_db(using)
+    if search_backend(using) == 'fts5':
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    else:
+        term_model.objects.using(using).all().delete()
+    indexed = 0
+    batch = []
+    posts = post_model.objects.using(using).only('title', 'text')
+    for post in posts.order_by('pk').iterator(batch_size):
+        batch.append(post)
+        if len(batch) == batch_size:
+            index_posts(batch, using, term_model)
+            indexed += len(batch)
+            batch = []
+    index_posts(batch, using, term_model)
+    return indexed + len(batch)
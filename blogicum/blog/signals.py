@@ -1,20 +1,316 @@
-from django.db.models.signals import post_save, post_delete
+from django.conf import settings
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
 from django.dispatch import receiver
-from .models import Comment, Post  # noqa: F401
+from django.utils import timezone
+
+from .cache import (
+    ALL_PAGES, category_page_group, invalidate_post_card,
+    invalidate_post_cards, purge_pages
+)
+from .connections import check_connections, record_connection_event
+from .counters import (
+    POST_COUNTER_FIELDS, comment_counts_changed, get_post_counter_state,
+    increment_comment_count, is_comment_counter_tracked, post_counter_state,
+    post_counts_changed, update_post_counts
+)
+from .jobs import enqueue_image_job
+from .models import Category, Comment, Location, Post, User
+from .publication import post_visibility_changed, refresh_post_visibility
+from .search import index_post, unindex_post
+from .sqlite import apply_pragmas
+
+# update_fields entries that can change the post counters. Post.save()
+# adds `is_visible` whenever the visibility may have changed.
+POST_COUNTED_FIELD_NAMES = {'is_visible', 'author', 'author_id'}
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """Применяет настройки SQLITE_PRAGMAS к новому соединению SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, getattr(settings, 'SQLITE_PRAGMAS', {}))
+
+
+@receiver(connection_created)
+def count_connection_open(sender, connection, **kwargs):
+    """Учитывает открытие нового соединения с базой данных."""
+    record_connection_event(connection.alias, 'opens')
+
+
+@receiver(request_started)
+def check_persistent_connections(sender, **kwargs):
+    """
+    Проверяет сохранённые с прошлых запросов соединения перед их
+    повторным использованием.
+    """
+    check_connections()
+
+
+@receiver(pre_save, sender=Comment)
+def remember_comment_visibility(sender, instance, raw=False, **kwargs):
+    """Запоминает, был ли комментарий опубликован до сохранения."""
+    instance._was_published = (
+        None if raw or instance.pk is None
+        else Comment.objects.filter(pk=instance.pk).values_list(
+            'is_published', flat=True
+        ).first()
+    )
 
 
 @receiver(post_save, sender=Comment)
 def update_comment_count_on_create(sender, instance, created, **kwargs):
-    """Обновляет количество комментариев при создании нового."""
+    """Увеличивает счётчик комментариев публикации на единицу."""
+    if (
+        created and instance.is_published
+        and is_comment_counter_tracked(instance.post_id)
+    ):
+        increment_comment_count(instance.post_id)
+
+
+@receiver(post_save, sender=Comment)
+def touch_post_on_comment_edit(sender, instance, created, **kwargs):
+    """
+    Отмечает публикацию изменённой при редактировании комментария и
+    сдвигает счётчик, если комментарий скрыли или вернули.
+    """
     if created:
-        post = instance.post
-        post.comment_count = post.comments.count()
-        post.save()
+        return
+    was_published = getattr(instance, '_was_published', None)
+    if (
+        was_published is not None
+        and was_published != instance.is_published
+        and is_comment_counter_tracked(instance.post_id)
+    ):
+        increment_comment_count(
+            instance.post_id, 1 if instance.is_published else -1
+        )
+    else:
+        Post.objects.filter(pk=instance.post_id).update(
+            updated_at=timezone.now()
+        )
 
 
 @receiver(post_delete, sender=Comment)
 def update_comment_count_on_delete(sender, instance, **kwargs):
-    """Обновляет количество комментариев при удалении."""
-    post = instance.post
-    post.comment_count = post.comments.count()
-    post.save()
+    """Уменьшает счётчик комментариев публикации на единицу."""
+    if instance.is_published and is_comment_counter_tracked(
+        instance.post_id
+    ):
+        increment_comment_count(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_card_on_change(sender, instance, **kwargs):
+    """Удаляет закэшированную карточку изменённой публикации."""
+    invalidate_post_card(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_post_cards_on_change(sender, instance, **kwargs):
+    """Сбрасывает все карточки: категории и места выводятся в каждой."""
+    invalidate_post_cards()
+
+
+@receiver(post_save, sender=User)
+def invalidate_post_cards_on_username_change(
+    sender, instance, created, update_fields=None, **kwargs
+):
+    """Сбрасывает карточки, если у автора могло измениться имя."""
+    if not created and (update_fields is None or 'username' in update_fields):
+        invalidate_post_cards()
+        purge_pages(ALL_PAGES)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_post_state(sender, instance, raw=False, **kwargs):
+    """
+    Запоминает прежние категорию, фото и состояние для счётчиков
+    публикаций: нужно сбросить кэш страницы старой категории,
+    пересоздать копии изменившегося фото и сдвинуть счётчики.
+    """
+    previous = None
+    if not raw and instance.pk is not None:
+        previous = Post.objects.filter(pk=instance.pk).values_list(
+            'category__slug', 'image', *POST_COUNTER_FIELDS
+        ).first()
+    instance._previous_category_slug, instance._previous_image = (
+        previous[:2] if previous else (None, None)
+    )
+    instance._previous_counter_state = (
+        post_counter_state(previous[2:]) if previous else None
+    )
+
+
+@receiver(post_save, sender=Post)
+def enqueue_image_processing(sender, instance, raw=False, **kwargs):
+    """Ставит новое фото публикации в очередь на обработку."""
+    if raw or instance.image.name == getattr(
+        instance, '_previous_image', None
+    ):
+        return
+    replaced_image = getattr(instance, '_previous_image', None) or ''
+    instance._previous_image = instance.image.name
+    enqueue_image_job(instance, replaced_image)
+    invalidate_post_card(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def update_post_counts_on_save(
+    sender, instance, raw=False, update_fields=None, **kwargs
+):
+    """
+    Сдвигает счётчики публикаций категории и автора, если публикация
+    появилась, скрылась или перешла к другой категории или автору.
+    """
+    if raw or (
+        update_fields is not None
+        and not set(update_fields) & POST_COUNTED_FIELD_NAMES
+    ):
+        return
+    state = post_counter_state(
+        (instance.author_id, instance.category_id, instance.is_visible)
+    )
+    update_post_counts(
+        getattr(instance, '_previous_counter_state', None), state
+    )
+    instance._previous_counter_state = state
+
+
+@receiver(pre_delete, sender=Post)
+def remember_post_counter_state(sender, instance, **kwargs):
+    instance._previous_counter_state = get_post_counter_state(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def update_post_counts_on_delete(sender, instance, **kwargs):
+    """Убирает удалённую публикацию из счётчиков."""
+    update_post_counts(
+        getattr(instance, '_previous_counter_state', None), None
+    )
+
+
+@receiver(post_save, sender=Post)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    """Переиндексирует публикацию при изменении заголовка или текста."""
+    if update_fields is None or {'title', 'text'} & set(update_fields):
+        index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def purge_pages_on_post_change(sender, instance, **kwargs):
+    """Сбрасывает кэш главной и страниц категорий публикации."""
+    slugs = {getattr(instance, '_previous_category_slug', None)}
+    if instance.category_id is not None:
+        slugs.add(
+            Category.objects.filter(pk=instance.category_id)
+            .values_list('slug', flat=True).first()
+        )
+    purge_pages('index', *(
+        category_page_group(slug) for slug in slugs if slug
+    ))
+
+
+@receiver(comment_counts_changed)
+def purge_pages_on_comment_count_change(sender, post_ids, **kwargs):
+    """Сбрасывает кэш страниц, где выводится число комментариев."""
+    slugs = Category.objects.filter(
+        posts__pk__in=post_ids
+    ).values_list('slug', flat=True).distinct()
+    purge_pages('index', *(category_page_group(slug) for slug in slugs))
+
+
+@receiver(post_counts_changed)
+def purge_pages_on_post_count_change(
+    sender, category_ids, author_ids=(), **kwargs
+):
+    """
+    Сбрасывает кэш страниц категорий с исправленными счётчиками.
+    ETag профилей строится по версии главной, поэтому при исправлении
+    счётчиков авторов сбрасывается и она.
+    """
+    slugs = Category.objects.filter(
+        pk__in=category_ids
+    ).values_list('slug', flat=True)
+    purge_pages(
+        *(['index'] if author_ids else []),
+        *(category_page_group(slug) for slug in slugs)
+    )
+
+
+@receiver(post_visibility_changed)
+def purge_pages_on_visibility_change(sender, category_ids, **kwargs):
+    """
+    Сбрасывает кэш главной и страниц категорий, где публикации
+    появились или скрылись.
+    """
+    slugs = Category.objects.filter(
+        pk__in=category_ids
+    ).values_list('slug', flat=True)
+    purge_pages('index', *(category_page_group(slug) for slug in slugs))
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_slug(sender, instance, raw=False, **kwargs):
+    previous = None
+    if not raw and instance.pk is not None:
+        previous = Category.objects.filter(pk=instance.pk).values_list(
+            'slug', 'is_published'
+        ).first()
+    instance._previous_slug, instance._was_published = (
+        previous or (None, None)
+    )
+
+
+@receiver(post_save, sender=Category)
+def refresh_visibility_on_category_change(
+    sender, instance, created, raw=False, **kwargs
+):
+    """
+    Обновляет видимость публикаций категории, когда её скрыли или
+    вернули.
+    """
+    was_published = getattr(instance, '_was_published', None)
+    if raw or created or was_published in (None, instance.is_published):
+        return
+    refresh_post_visibility(Post.objects.filter(category=instance))
+
+
+@receiver(post_delete, sender=Category)
+def hide_posts_on_category_delete(sender, instance, **kwargs):
+    """Скрывает публикации, оставшиеся без категории."""
+    refresh_post_visibility(
+        Post.objects.filter(category__isnull=True, is_visible=True)
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def purge_pages_on_category_change(sender, instance, **kwargs):
+    """Сбрасывает кэш главной и страницы категории."""
+    slugs = {instance.slug, getattr(instance, '_previous_slug', None)}
+    purge_pages('index', *(
+        category_page_group(slug) for slug in slugs if slug
+    ))
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def purge_pages_on_location_change(sender, instance, **kwargs):
+    """Сбрасывает кэш всех страниц: место выводится в карточках."""
+    purge_pages(ALL_PAGES)
@@ -0,0 +1,21 @@
+import re
+
+_PRAGMA_NAME_RE = re.compile(r'^[a-z_]+$')
+_PRAGMA_VALUE_RE = re.compile(r'^-?\w+$')
+
+
+def apply_pragmas(cursor, pragmas):
+    """
+    Run `PRAGMA name = value` for every item of `pragmas` on a DB-API
+    cursor of an SQLite connection. busy_timeout goes first, so the
+    other pragmas already wait for a locked database.
+    """
+    for name, value in sorted(
+        pragmas.items(), key=lambda item: item[0] != 'busy_timeout'
+    ):
+        value = str(value)
+        if not (
+            _PRAGMA_NAME_RE.match(name) and _PRAGMA_VALUE_RE.match(value)
+        ):
+            raise ValueError(f'Invalid SQLite pragma: {name} = {value}')
+        cursor.execute(f'PRAGMA {name} = {value}')
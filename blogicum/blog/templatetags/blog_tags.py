@@ -0,0 +1,33 @@
+from django import template
+from django.core.cache import cache
+from django.template.loader import get_template
+
+from blog.cache import (
+    POST_CARD_GENERATION_KEY, POST_CARD_TIMEOUT, get_post_cards_generation,
+    post_card_key, post_card_version
+)
+
+register = template.Library()
+
+POST_CARD_TEMPLATE = 'includes/post_card.html'
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post):
+    """Render the post card, reusing the cached HTML when it is fresh."""
+    if POST_CARD_GENERATION_KEY not in context.render_context:
+        context.render_context[POST_CARD_GENERATION_KEY] = (
+            get_post_cards_generation()
+        )
+    key = post_card_key(
+        post.pk, context.render_context[POST_CARD_GENERATION_KEY]
+    )
+    version = post_card_version(post)
+
+    cached = cache.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    html = get_template(POST_CARD_TEMPLATE).render({'post': post})
+    cache.set(key, (version, html), POST_CARD_TIMEOUT)
+    return html
@@ -0,0 +1,149 @@
+import itertools
+import json
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.core import serializers
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.serializers.python import Deserializer
+from django.db import connections, router
+
+from .models import Post
+from .search import index_posts
+
+# Exported and imported models, parents before children.
+TRANSFER_MODELS = (
+    'auth.user',
+    'blog.category',
+    'blog.location',
+    'blog.post',
+    'blog.comment',
+)
+
+
+def export_lines(batch_size=1000):
+    """
+    Yield the blog data as JSON Lines in the format of Django fixtures,
+    one object per line. Tables are read in keyset batches by pk, so
+    memory use does not depend on their size. Many-to-many relations
+    (user groups and permissions) are not exported.
+    """
+    for label in TRANSFER_MODELS:
+        model = apps.get_model(label)
+        fields = [
+            field.name for field in model._meta.local_concrete_fields
+            if not field.primary_key
+        ]
+        last_pk = None
+        while True:
+            batch = model._base_manager.order_by('pk')
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            batch = list(batch[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            for obj in serializers.serialize('python', batch, fields=fields):
+                yield json.dumps(
+                    obj, cls=DjangoJSONEncoder, ensure_ascii=False
+                ) + '\n'
+
+
+def read_objects(stream):
+    """
+    Yield the fixture objects of a JSON Lines stream. A regular JSON
+    fixture (an array, like the one `dumpdata` writes) is also
+    accepted, but it is read into memory at once.
+    """
+    first_line = stream.readline()
+    if first_line.lstrip().startswith('['):
+        yield from json.loads(first_line + stream.read())
+        return
+    for line in itertools.chain([first_line], stream):
+        if line.strip():
+            yield json.loads(line)
+
+
+@contextmanager
+def _stored_dates(fields):
+    """
+    Let bulk_create() write the dates set on the objects instead of
+    stamping auto_now and auto_now_add fields with the current time.
+    """
+    flags = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in flags:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _insert(model, rows):
+    """
+    Insert deserialized rows with their primary keys and stored dates.
+    bulk_create() sends no model signals. Dates missing from the rows
+    get the current time.
+    """
+    objs = [
+        deserialized.object
+        for deserialized in Deserializer(rows, ignorenonexistent=True)
+    ]
+    auto_dates = [
+        field for field in model._meta.local_concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    for obj in objs:
+        for field in auto_dates:
+            if getattr(obj, field.attname) is None:
+                field.pre_save(obj, add=True)
+    with _stored_dates(auto_dates):
+        model._base_manager.using(
+            router.db_for_write(model)
+        ).bulk_create(objs)
+    if model is Post:
+        index_posts(objs)
+
+
+def import_objects(objects, batch_size=1000):
+    """
+    Insert the fixture objects in batches of `batch_size` per model.
+    No model signals are sent: the caller recounts comments and
+    resets caches afterwards. Return counters of imported and skipped
+    objects by model label.
+
+    Foreign keys are checked at commit, so the import must run in a
+    transaction, but objects may come in any order.
+    """
+    imported, skipped = Counter(), Counter()
+    pending = defaultdict(list)
+    for obj in objects:
+        label = obj['model'].lower()
+        if label not in TRANSFER_MODELS:
+            skipped[label] += 1
+            continue
+        pending[label].append(obj)
+        if len(pending[label]) >= batch_size:
+            rows = pending.pop(label)
+            _insert(apps.get_model(label), rows)
+            imported[label] += len(rows)
+    for label, rows in pending.items():
+        _insert(apps.get_model(label), rows)
+        imported[label] += len(rows)
+    return imported, skipped
+
+
+def reset_sequences(labels):
+    """Move primary key sequences past the imported ids."""
+    models = [apps.get_model(label) for label in labels]
+    for db in {router.db_for_write(model) for model in models}:
+        connection = connections[db]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
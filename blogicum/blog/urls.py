@@ -1,10 +1,14 @@
 from django.urls import path
 from . import views
+from .cache import anonymous_page_cache
 
 app_name = 'blog'
 
 urlpatterns = [
-    path('', views.IndexListView.as_view(), name='index'),
+    path('', anonymous_page_cache(views.IndexListView.as_view(), 'index'),
+         name='index'),
+    path('search/', views.SearchListView.as_view(), name='search'),
+    path('stats/', views.StatsView.as_view(), name='stats'),
     path('posts/<int:post_id>/', views.PostDetailView.as_view(),
          name='post_detail'),
     path('posts/create/', views.PostCreateView.as_view(), name='create_post'),
@@ -13,7 +17,9 @@ urlpatterns = [
     path('posts/<int:post_id>/delete/',
          views.PostDeleteView.as_view(), name='delete_post'),
     path('category/<slug:category_slug>/',
-         views.CategoryDetailView.as_view(), name='category_posts'),
+         anonymous_page_cache(views.CategoryDetailView.as_view(),
+                              'category:{category_slug}'),
+         name='category_posts'),
     path('profile/<slug:profilename>/',
          views.ProfileDetailView.as_view(), name='profile'),
     path('profile/<slug:profilename>/edit/',
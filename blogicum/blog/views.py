@@ -1,34 +1,167 @@
-from django.contrib.auth.mixins import LoginRequiredMixin
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.models import User
-from django.db.models import Count
+from django.core.exceptions import ImproperlyConfigured
+from django.core.paginator import InvalidPage
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
-from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag, urlencode
 from django.views.generic import (
-    CreateView, DeleteView, DetailView, ListView, UpdateView
+    CreateView, DeleteView, DetailView, ListView, UpdateView, View
+)
+from .cache import (
+    ALL_PAGES, category_page_group, get_page_cache_stats,
+    get_page_group_versions, get_post_cards_generation
 )
+from .connections import get_connection_stats
 from .forms import CommentForm, PostForm
-from .models import Category, Comment, Post
+from .models import Category, Comment, Post, ProfileStats
+from .middleware import get_query_stats
+from .paginators import CursorPaginator, PrecountedPaginator
+from .routers import replica_reads
+from .search import search_posts
 
 # CBV - Class-based views
 
 DISPLAYING_POSTS_ON_PAGE = 10
+DISPLAYING_COMMENTS_ON_PAGE = 50
 
 
 def filter_out_posts(posts, is_need_availability_filter=True):
-    """Filter the received posts from the database."""
-    posts_and_comments = posts.annotate(
-        comments_count=Count('comments')
-    ).order_by('-pub_date')
+    """
+    Filter the received posts from the database.
+
+    Comment counts are read from the stored `Post.comment_count`
+    counter, so no aggregation over comments is needed.
+    """
+    posts = posts.order_by('-pub_date')
 
     if not is_need_availability_filter:
-        return posts_and_comments
+        return posts
+
+    return posts.published()
+
+
+class FeedPaginationMixin:
+    """
+    Paginate post listings either by page number (`?page=N`) or by
+    keyset cursor (`?cursor=<token>`). Cursor mode is used when the
+    `cursor` parameter is present, or by default when the
+    BLOG_CURSOR_PAGINATION setting is enabled.
+    """
+
+    paginate_by = DISPLAYING_POSTS_ON_PAGE
+    paginator_class = PrecountedPaginator
+    cursor_kwarg = 'cursor'
+    elided_pages_on_each_side = 2
+
+    def get_post_count(self):
+        """
+        Return the stored number of listed posts, or None to let the
+        paginator count them.
+        """
+        return None
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        return super().get_paginator(
+            queryset, per_page, count=self.get_post_count(), **kwargs
+        )
+
+    def use_cursor_pagination(self):
+        if self.cursor_kwarg in self.request.GET:
+            return True
+        return (
+            getattr(settings, 'BLOG_CURSOR_PAGINATION', False)
+            and self.page_kwarg not in self.request.GET
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.use_cursor_pagination():
+            paginator, page, object_list, is_paginated = (
+                super().paginate_queryset(queryset, page_size)
+            )
+            page.elided_page_range = paginator.get_elided_page_range(
+                page.number, on_each_side=self.elided_pages_on_each_side
+            )
+            return paginator, page, object_list, is_paginated
+
+        paginator = CursorPaginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidPage as error:
+            raise Http404(str(error))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class ConditionalGetMixin:
+    """
+    Answer conditional GET requests with 304 Not Modified before any
+    template is rendered. The ETag is built without scanning posts:
+    from the versions of the page cache groups the page belongs to,
+    which every change of its posts, comments, categories and
+    locations bumps through `purge_pages`. Views name the groups with
+    `get_validator_groups()` or override `get_validator_values()`.
+
+    No Last-Modified is sent: there is no date that moves when a post
+    is removed or a comment changes, so If-Modified-Since would get
+    stale 304 answers.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if (
+            cls.get_validator_values
+            is ConditionalGetMixin.get_validator_values
+            and not hasattr(cls, 'get_validator_groups')
+        ):
+            raise ImproperlyConfigured(
+                f'{cls.__name__} must define get_validator_groups() or'
+                ' override get_validator_values().'
+            )
+
+    def get_validator_values(self):
+        return get_page_group_versions(
+            ALL_PAGES, *self.get_validator_groups()
+        )
 
-    return posts_and_comments.filter(
-        pub_date__lte=timezone.now(),
-        is_published=True,
-        category__is_published=True
-    )
+    def get_etag(self):
+        etag = hashlib.md5(':'.join(map(str, (
+            *self.get_validator_values(),
+            # Bumped when categories, locations or usernames change.
+            get_post_cards_generation(),
+            self.request.user.pk,
+            self.request.get_full_path(),
+        ))).encode()).hexdigest()
+        return quote_etag(etag)
+
+    def get(self, request, *args, **kwargs):
+        etag = self.get_etag()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        response['ETag'] = etag
+        return response
+
+
+class ReplicaReadMixin:
+    """
+    Serve GET and HEAD requests from a read replica. The response is
+    rendered inside the block, so lazy querysets used by the template
+    read from the replica too.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        with replica_reads():
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+        return response
 
 
 class PostMixin:
@@ -60,37 +193,102 @@ class CommentChangeMixin(UserIsAuthorMixin, RedirectToPostMixin):
     template_name = 'blog/comment.html'
 
 
-class IndexListView(ListView):
+class IndexListView(
+    ReplicaReadMixin, ConditionalGetMixin, FeedPaginationMixin, ListView
+):
     """Display the main page."""
 
     model = Post
-    queryset = filter_out_posts(Post.objects)
     template_name = 'blog/index.html'
-    paginate_by = DISPLAYING_POSTS_ON_PAGE
 
+    def get_validator_groups(self):
+        return ['index']
 
-class PostDetailView(PostMixin, DetailView):
-    """Display the requested post."""
+    def get_queryset(self):
+        return filter_out_posts(Post.objects.for_feed())
 
-    template_name = 'blog/detail.html'
 
-    def get_object(self):
-        post = get_object_or_404(
-            Post.objects,
-            id=self.kwargs.get(self.pk_url_kwarg)
+class SearchListView(ReplicaReadMixin, FeedPaginationMixin, ListView):
+    """Display published posts matching the search query, best first."""
+
+    model = Post
+    template_name = 'blog/search.html'
+    query_kwarg = 'q'
+
+    def use_cursor_pagination(self):
+        # Results are ordered by relevance, not by (pub_date, id).
+        return False
+
+    def get_search_query(self):
+        return self.request.GET.get(self.query_kwarg, '').strip()
+
+    def get_queryset(self):
+        return search_posts(
+            self.get_search_query(), Post.objects.published().for_feed()
         )
 
-        if self.request.user != post.author:
-            return get_object_or_404(
-                filter_out_posts(Post.objects),
-                id=self.kwargs.get(self.pk_url_kwarg)
-            )
-        return post
+    def get_context_data(self, **kwargs):
+        query = self.get_search_query()
+        return super().get_context_data(
+            search_query=query,
+            pagination_query=urlencode({self.query_kwarg: query}) + '&',
+            **kwargs
+        )
+
+
+class PostDetailView(
+    ReplicaReadMixin, ConditionalGetMixin, PostMixin, DetailView
+):
+    """Display the requested post."""
+
+    template_name = 'blog/detail.html'
+    comments_page_kwarg = 'comments_page'
+
+    def get_validator_values(self):
+        # The post is needed anyway, so it provides the validators
+        # and the page keeps its two queries.
+        post = self.get_object()
+        return post.comment_count, post.updated_at, post.pub_date
+
+    def get_queryset(self):
+        return Post.objects.select_related(
+            'author', 'category', 'location'
+        ).visible_to(self.request.user)
+
+    def get_object(self, queryset=None):
+        if getattr(self, 'object', None) is None:
+            self.object = super().get_object(queryset)
+        return self.object
+
+    def get_comments_page(self):
+        """
+        Return one page of the post comments and the numbers of the
+        neighbouring pages, so long threads stay bounded in size.
+        """
+        try:
+            number = int(self.request.GET.get(self.comments_page_kwarg, 1))
+        except ValueError:
+            raise Http404('Неверный номер страницы комментариев.')
+        if number < 1:
+            raise Http404('Неверный номер страницы комментариев.')
+        start = (number - 1) * DISPLAYING_COMMENTS_ON_PAGE
+        comments = list(
+            self.object.comments.filter(is_published=True)
+            .select_related('author').only(
+                'text', 'created_at', 'post', 'author__username'
+            )[start:start + DISPLAYING_COMMENTS_ON_PAGE + 1]
+        )
+        has_next = len(comments) > DISPLAYING_COMMENTS_ON_PAGE
+        return dict(
+            comments=comments[:DISPLAYING_COMMENTS_ON_PAGE],
+            comments_next_page=number + 1 if has_next else None,
+            comments_previous_page=number - 1 if number > 1 else None,
+        )
 
     def get_context_data(self, **kwargs):
         return dict(
-            comments=self.get_object().comments.all(),
             form=CommentForm(),
+            **self.get_comments_page(),
             **super().get_context_data(**kwargs)
         )
 
@@ -129,42 +327,67 @@ class PostDeleteView(
         )
 
 
-class CategoryDetailView(ListView):
+class CategoryDetailView(
+    ReplicaReadMixin, ConditionalGetMixin, FeedPaginationMixin, ListView
+):
     """Render a category view with set of posts."""
 
     model = Category
     slug_url_kwarg = 'category_slug'
     template_name = 'blog/category.html'
-    paginate_by = DISPLAYING_POSTS_ON_PAGE
+
+    def get_validator_groups(self):
+        return [category_page_group(self.kwargs[self.slug_url_kwarg])]
+
+    def get_post_count(self):
+        return self.category.published_post_count
 
     def get_context_data(self, **kwargs):
-        category = get_object_or_404(
+        self.category = get_object_or_404(
             Category, is_published=True,
             slug=self.kwargs.get(self.slug_url_kwarg)
         )
-        self.object_list = filter_out_posts(category.posts.all())
-        return dict(category=category, **super().get_context_data(**kwargs))
+        self.object_list = filter_out_posts(self.category.posts.for_feed())
+        return dict(
+            category=self.category, **super().get_context_data(**kwargs)
+        )
 
 
-class ProfileDetailView(ListView):
+class ProfileDetailView(
+    ReplicaReadMixin, ConditionalGetMixin, FeedPaginationMixin, ListView
+):
     """Render author's profile view with an array of posts by that author."""
 
     model = User
     slug_field = 'username'
     slug_url_kwarg = 'profilename'
     template_name = 'blog/profile.html'
-    paginate_by = DISPLAYING_POSTS_ON_PAGE
+
+    def get_validator_groups(self):
+        # Every change of a post, shown or not, purges the index.
+        return ['index']
+
+    def get_post_count(self):
+        try:
+            stats = self.author.profile_stats
+        except ProfileStats.DoesNotExist:
+            return 0
+        if self.request.user == self.author:
+            return stats.post_count
+        return stats.published_post_count
 
     def get_context_data(self, **kwargs):
-        author = get_object_or_404(
-            User,
+        self.author = get_object_or_404(
+            User.objects.select_related('profile_stats'),
             username=self.kwargs.get(self.slug_url_kwarg)
         )
         self.object_list = filter_out_posts(
-            author.posts.all(),
-            is_need_availability_filter=self.request.user != author
+            self.author.posts.for_feed(),
+            is_need_availability_filter=self.request.user != self.author
+        )
+        return dict(
+            profile=self.author, **super().get_context_data(**kwargs)
         )
-        return dict(profile=author, **super().get_context_data(**kwargs))
 
 
 class ProfileUpdateView(LoginRequiredMixin, UpdateView):
@@ -213,3 +436,22 @@ class CommentUpdateView(CommentChangeMixin, LoginRequiredMixin, UpdateView):
 
 class CommentDeleteView(CommentChangeMixin, LoginRequiredMixin, DeleteView):
     """Delete the selected comment."""
+
+
+class StatsView(UserPassesTestMixin, View):
+    """
+    Show query, page cache and connection stats to staff members as
+    JSON. Connection stats are those of the worker process answering;
+    query stats of other workers lag by up to
+    BLOG_QUERY_STATS_FLUSH_SECONDS.
+    """
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({
+            'queries': get_query_stats(),
+            'page_cache': get_page_cache_stats(),
+            'connections': get_connection_stats(),
+        })
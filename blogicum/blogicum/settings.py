@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +45,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'blog.middleware.QueryInstrumentationMiddleware',
+    'blog.middleware.ReplicaStickinessMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -79,10 +82,76 @@ WSGI_APPLICATION = 'blogicum.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Connections are kept open between requests for BLOG_CONN_MAX_AGE seconds
+# (0 closes them after every request) and checked before reuse unless
+# BLOG_CONN_HEALTH_CHECKS is disabled.
+BLOG_CONN_MAX_AGE = int(os.environ.get('BLOGICUM_CONN_MAX_AGE', 60))
+BLOG_CONN_HEALTH_CHECKS = True
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': BLOG_CONN_MAX_AGE,
+    }
+}
+
+# Read replicas, e.g. BLOGICUM_SQLITE_REPLICAS=replica1.sqlite3,replica2.sqlite3
+# for local copies of the database. GET requests of the post listings
+# and pages read from a random replica; writes, and every request of
+# a visitor for REPLICA_STICKY_SECONDS after they wrote, use 'default'.
+DATABASE_REPLICAS = []
+for number, name in enumerate(
+    filter(None, os.environ.get('BLOGICUM_SQLITE_REPLICAS', '').split(',')),
+    start=1,
+):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / name.strip(),
+        'CONN_MAX_AGE': BLOG_CONN_MAX_AGE,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['blog.routers.ReplicaRouter']
+
+REPLICA_STICKY_SECONDS = 5
+
+# Applied to every new SQLite connection. In WAL mode readers are not
+# blocked by a writer, and writers wait for the lock up to
+# busy_timeout milliseconds instead of failing with
+# "database is locked".
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 128 * 1024 * 1024,
+    # Negative values are KiB rather than pages.
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+# Cached pages, post cards and counters are invalidated by purges, and
+# a purge only reaches the cache of the process that sends it. The
+# default LocMemCache is therefore only correct for a single process
+# (runserver, tests). Deployments with several workers, or with the
+# publish_scheduled_posts command running separately, must share the
+# cache, e.g.
+# BLOGICUM_CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache
+# BLOGICUM_CACHE_LOCATION=127.0.0.1:11211
+# or django.core.cache.backends.filebased.FileBasedCache with a
+# directory as the location.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'BLOGICUM_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('BLOGICUM_CACHE_LOCATION', ''),
     }
 }
 
@@ -140,6 +209,20 @@ AUTH_USER_MODEL = 'auth.User'
 
 LOGIN_REDIRECT_URL = '/'
 
+# Paginate post listings by keyset cursor unless `?page=N` is requested.
+BLOG_CURSOR_PAGINATION = False
+
+# Requests making more queries than the budget of their view are
+# logged to `blog.queries`; '*' applies to views not listed. Budgets
+# include the session and user queries of logged in visitors.
+BLOG_QUERY_BUDGETS = {
+    '*': 10,
+    'blog:index': 6,
+    'blog:category_posts': 7,
+    'blog:profile': 6,
+    'blog:post_detail': 4,
+}
+
 MEDIA_ROOT = BASE_DIR / 'media'
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
@@ -1,19 +1,29 @@
 from django.urls import path
 from django.views.generic import TemplateView
 
+from blog.cache import anonymous_page_cache
+
 app_name = "pages"
 
 urlpatterns = [
     # Страница о проекте.
     path(
         "about/",
-        TemplateView.as_view(template_name="pages/about.html"),
+        anonymous_page_cache(
+            TemplateView.as_view(template_name="pages/about.html"),
+            "pages",
+            scheduled_posts=False,
+        ),
         name="about",
     ),
     # Страница правила.
     path(
         "rules/",
-        TemplateView.as_view(template_name="pages/rules.html"),
+        anonymous_page_cache(
+            TemplateView.as_view(template_name="pages/rules.html"),
+            "pages",
+            scheduled_posts=False,
+        ),
         name="rules",
     ),
 ]
@@ -0,0 +1,127 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def many_posts(mixer, user, published_category, published_locations):
+    return mixer.cycle(30).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        location=mixer.sequence(*published_locations),
+    )
+
+
+def _count_queries(captured):
+    return [
+        query["sql"] for query in captured.captured_queries
+        if "COUNT(" in query["sql"].upper()
+    ]
+
+
+def test_post_changelist_queries_do_not_grow(admin_client, many_posts):
+    url = "/admin/blog/post/"
+    with CaptureQueriesContext(connection) as captured:
+        assert admin_client.get(url).status_code == 200
+    n_queries = len(captured)
+    many_posts[0].delete()
+    with CaptureQueriesContext(connection) as captured:
+        admin_client.get(url)
+    assert len(captured) == n_queries, (
+        "Убедитесь, что список публикаций в админке загружает автора,"
+        " категорию и местоположение одним запросом."
+    )
+
+
+def test_large_post_changelist_uses_estimated_count(
+        admin_client, many_posts, monkeypatch
+):
+    monkeypatch.setattr(
+        "blog.paginators.APPROXIMATE_COUNT_THRESHOLD", len(many_posts) // 2
+    )
+    with CaptureQueriesContext(connection) as captured:
+        response = admin_client.get("/admin/blog/post/")
+    assert not _count_queries(captured), (
+        "Убедитесь, что для большой таблицы публикаций админка не"
+        " выполняет точный COUNT(*)."
+    )
+    assert response.context["cl"].result_count >= len(many_posts)
+
+    with CaptureQueriesContext(connection) as captured:
+        admin_client.get("/admin/blog/post/", {"is_published__exact": "1"})
+    assert _count_queries(captured), (
+        "Убедитесь, что отфильтрованный список считается точно."
+    )
+
+
+def test_post_form_uses_autocomplete(admin_client, many_posts):
+    content = admin_client.get(
+        f"/admin/blog/post/{many_posts[0].pk}/change/"
+    ).content.decode("utf-8")
+    assert content.count("admin-autocomplete") >= 3, (
+        "Убедитесь, что автор, категория и местоположение выбираются"
+        " через автодополнение."
+    )
+
+
+@pytest.fixture
+def commented_posts(mixer, user, many_posts):
+    posts = many_posts[:3]
+    for post in posts:
+        mixer.cycle(4).blend("blog.Comment", post=post, author=user)
+    return posts
+
+
+@pytest.mark.parametrize(
+    "action, n_queries",
+    (
+        # Session, user, the changelist, the selected comments, one
+        # grouped count, the UPDATEs of comments and counters and the
+        # purged pages.
+        ("hide_comments", 10),
+        # Plus the deletion collector and a log entry per comment.
+        ("delete_selected", 18),
+    ),
+)
+def test_comment_bulk_actions_recount_posts(
+        admin_client, commented_posts, action, n_queries,
+        django_assert_max_num_queries
+):
+    from blog.models import Comment
+
+    selected = Comment.objects.filter(post__in=commented_posts[:2])[::2]
+    data = {
+        "action": action,
+        "_selected_action": [comment.pk for comment in selected],
+        "post": "yes",
+    }
+    with django_assert_max_num_queries(n_queries):
+        admin_client.post("/admin/blog/comment/", data)
+    for post in commented_posts:
+        post.refresh_from_db()
+        assert post.comment_count == post.comments.filter(
+            is_published=True
+        ).count(), (
+            "Убедитесь, что массовые действия над комментариями"
+            " пересчитывают счётчики публикаций."
+        )
+    assert commented_posts[0].comment_count == 2
+    assert commented_posts[2].comment_count == 4
+
+
+def test_hidden_comment_is_not_shown(client, commented_posts):
+    from blog.models import Comment
+
+    comment = Comment.objects.filter(post=commented_posts[0]).first()
+    comment.is_published = False
+    comment.save()
+    commented_posts[0].refresh_from_db()
+    assert commented_posts[0].comment_count == 3
+    response = client.get(f"/posts/{commented_posts[0].pk}/")
+    assert comment not in response.context["comments"], (
+        "Убедитесь, что скрытые комментарии не выводятся на странице"
+        " публикации."
+    )
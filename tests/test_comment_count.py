@@ -0,0 +1,122 @@
+import pytest
+from django.core.management import call_command
+
+from conftest import N_PER_FIXTURE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def commented_post(mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category
+    )
+    mixer.cycle(N_PER_FIXTURE).blend("blog.Comment", post=post, author=user)
+    return post
+
+
+def test_recount_comments_fixes_drifted_counters(commented_post):
+    from blog.models import Post
+
+    Post.objects.filter(pk=commented_post.pk).update(comment_count=42)
+    call_command("recount_comments", batch_size=1)
+    commented_post.refresh_from_db()
+    assert commented_post.comment_count == N_PER_FIXTURE, (
+        "Убедитесь, что команда `recount_comments` приводит `comment_count`"
+        " в соответствие с числом комментариев публикации."
+    )
+
+
+def test_comment_count_follows_create_and_delete(mixer, user, commented_post):
+    commented_post.refresh_from_db()
+    assert commented_post.comment_count == N_PER_FIXTURE
+
+    commented_post.comments.first().delete()
+    commented_post.refresh_from_db()
+    assert commented_post.comment_count == N_PER_FIXTURE - 1, (
+        "Убедитесь, что при удалении комментария счётчик комментариев"
+        " публикации уменьшается."
+    )
+
+
+def test_post_save_keeps_comment_count(user, commented_post):
+    from blog.models import Post
+
+    stale_post = Post.objects.get(pk=commented_post.pk)
+    Post.objects.filter(pk=commented_post.pk).update(comment_count=100)
+    stale_post.title = "new title"
+    stale_post.save()
+    stale_post.refresh_from_db()
+    assert stale_post.comment_count == 100, (
+        "Убедитесь, что сохранение публикации не перезаписывает счётчик"
+        " комментариев устаревшим значением."
+    )
+
+
+def test_bulk_comment_delete_updates_counters_once(
+        mixer, user, commented_post, published_category,
+        django_assert_max_num_queries
+):
+    from blog.models import Comment
+
+    other_post = mixer.blend(
+        "blog.Post", author=user, category=published_category
+    )
+    mixer.cycle(N_PER_FIXTURE).blend(
+        "blog.Comment", post=other_post, author=user
+    )
+    # SELECT of post ids, collector SELECT, DELETE, counters UPDATE,
+    # categories whose cached pages are purged and the savepoint.
+    with django_assert_max_num_queries(7):
+        Comment.objects.all().delete()
+    for post in (commented_post, other_post):
+        post.refresh_from_db()
+        assert post.comment_count == 0, (
+            "Убедитесь, что массовое удаление комментариев обновляет"
+            " счётчики публикаций."
+        )
+
+
+def test_post_cascade_skips_counter_updates(
+        commented_post, django_assert_max_num_queries
+):
+    from blog.models import Post
+
+    # Comments SELECT, DELETEs of image jobs, search terms, comments,
+    # the post and its search index entry, the category of purged
+    # pages, and the post counter state with the category and author
+    # counter UPDATEs.
+    with django_assert_max_num_queries(10):
+        commented_post.delete()
+    assert not Post.objects.filter(pk=commented_post.pk).exists()
+
+
+def test_failed_post_delete_keeps_counter_tracked(
+        commented_post, monkeypatch
+):
+    from django.db.models.deletion import Collector
+
+    from blog.counters import is_comment_counter_tracked
+
+    def fail(self):
+        raise RuntimeError('delete failed')
+
+    monkeypatch.setattr(Collector, 'delete', fail)
+    with pytest.raises(RuntimeError):
+        commented_post.delete()
+    assert is_comment_counter_tracked(commented_post.pk), (
+        "Убедитесь, что неудачное удаление публикации не отключает"
+        " обновление её счётчика комментариев."
+    )
+
+
+def test_comment_count_is_not_editable_in_forms():
+    from django.forms import modelform_factory
+
+    from blog.models import Post
+
+    form_class = modelform_factory(Post, exclude=())
+    assert "comment_count" not in form_class.base_fields, (
+        "Убедитесь, что счётчик комментариев нельзя изменить в форме:"
+        " `Post.save()` его не сохраняет."
+    )
@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+URLS = (
+    "/",
+    "/posts/{post.id}/",
+    "/category/{post.category.slug}/",
+    "/profile/{post.author.username}/",
+)
+
+
+@pytest.fixture
+def post(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post",
+        author=user,
+        is_published=True,
+        category=published_category,
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+
+
+@pytest.mark.parametrize("url", URLS)
+def test_matching_etag_skips_rendering(another_user_client, post, url):
+    url = url.format(post=post)
+    response = another_user_client.get(url)
+    assert response.status_code == 200
+    assert response.has_header("ETag")
+
+    response = another_user_client.get(
+        url, HTTP_IF_NONE_MATCH=response["ETag"]
+    )
+    assert response.status_code == 304, (
+        "Убедитесь, что при совпадении ETag страница отвечает кодом 304."
+    )
+    assert not response.templates, (
+        "Убедитесь, что ответ 304 отдаётся без отрисовки шаблонов."
+    )
+
+
+@pytest.mark.parametrize("url", URLS)
+def test_etag_changes_with_content(mixer, another_user_client, post, url):
+    url = url.format(post=post)
+    etag = another_user_client.get(url)["ETag"]
+    mixer.blend("blog.Comment", post=post, author=post.author)
+    response = another_user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        "Убедитесь, что ETag меняется при появлении нового комментария."
+    )
+
+
+@pytest.mark.parametrize("url", URLS[:1] + URLS[2:])
+def test_removed_post_is_not_answered_with_304(
+        mixer, another_user_client, post, url
+):
+    from blog.models import Post
+
+    url = url.format(post=post)
+    mixer.blend(
+        "blog.Post",
+        author=post.author,
+        category=post.category,
+        is_published=True,
+        pub_date=timezone.now() - timedelta(days=2),
+    )
+    etag = another_user_client.get(url)["ETag"]
+    Post.objects.filter(pk=post.pk).delete()
+    response = another_user_client.get(
+        url, HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT"
+    )
+    assert response.status_code == 200, (
+        "Убедитесь, что страница не отвечает кодом 304 по"
+        " If-Modified-Since после удаления публикации."
+    )
+    response = another_user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        "Убедитесь, что ETag меняется при удалении публикации."
+    )
+
+
+def test_view_without_validator_groups_is_rejected():
+    from django.core.exceptions import ImproperlyConfigured
+    from django.views.generic import ListView
+
+    from blog.views import ConditionalGetMixin
+
+    with pytest.raises(ImproperlyConfigured):
+        type("BrokenView", (ConditionalGetMixin, ListView), {})
@@ -0,0 +1,40 @@
+import pytest
+from django.db import connection
+
+from blog.connections import (
+    check_connections, get_connection_stats, reset_connection_stats
+)
+
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+@pytest.fixture(autouse=True)
+def clean_connection_stats():
+    reset_connection_stats()
+    yield
+    reset_connection_stats()
+
+
+def test_open_connections_are_checked_before_reuse(monkeypatch):
+    connection.ensure_connection()
+    check_connections()
+    monkeypatch.setattr(connection, "is_usable", lambda: False)
+    check_connections()
+    stats = get_connection_stats()["databases"]["default"]
+    assert stats["reuses"] == 1, (
+        "Убедитесь, что повторное использование соединения учитывается"
+        " в статистике."
+    )
+    assert stats["failures"] == 1, (
+        "Убедитесь, что неработающее соединение закрывается и"
+        " учитывается в статистике как сбой."
+    )
+
+
+def test_health_checks_can_be_disabled(settings, monkeypatch):
+    settings.BLOG_CONN_HEALTH_CHECKS = False
+    connection.ensure_connection()
+    monkeypatch.setattr(connection, "is_usable", lambda: False)
+    check_connections()
+    stats = get_connection_stats()["databases"]["default"]
+    assert stats["reuses"] == 1 and stats["failures"] == 0
@@ -0,0 +1,205 @@
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def scheduled_post(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post",
+        author=user,
+        is_published=True,
+        category=published_category,
+        pub_date=timezone.now() + timedelta(hours=1),
+    )
+
+
+def test_due_post_stays_hidden_until_scheduler_runs(client, scheduled_post):
+    from blog.models import Post
+
+    later = scheduled_post.pub_date + timedelta(minutes=1)
+    assert Post.objects.filter(
+        Post.objects.published_q(later), pk=scheduled_post.pk
+    ).exists()
+    with mock.patch("django.utils.timezone.now", return_value=later):
+        assert scheduled_post not in Post.objects.published(), (
+            "Убедитесь, что `published()` проверяет только флаг"
+            " `is_visible`, который выставляет `publish_due_posts()`."
+        )
+        response = client.get("/")
+    assert scheduled_post not in response.context["page_obj"], (
+        "Убедитесь, что без запуска `publish_scheduled_posts` отложенная"
+        " публикация не попадает в ленту."
+    )
+
+
+def test_scheduled_post_goes_live_when_published(client, scheduled_post):
+    from blog.publication import publish_due_posts
+
+    response = client.get("/")
+    assert scheduled_post not in response.context["page_obj"]
+
+    later = scheduled_post.pub_date + timedelta(minutes=1)
+    with mock.patch("django.utils.timezone.now", return_value=later):
+        assert publish_due_posts() == 1
+        response = client.get("/")
+    assert scheduled_post in response.context["page_obj"], (
+        "Убедитесь, что отложенная публикация попадает в ленту, когда"
+        " `publish_due_posts()` отмечает её видимой."
+    )
+
+
+@pytest.fixture
+def feed_posts(mixer, user, published_category, published_locations):
+    return mixer.cycle(N_PER_PAGE).blend(
+        "blog.Post",
+        author=mixer.SELECT,
+        is_published=True,
+        category=published_category,
+        location=mixer.sequence(*published_locations),
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+
+
+@pytest.mark.parametrize(
+    "url_template, n_queries",
+    (
+        # COUNT(*) for the paginator, the page of posts and the next
+        # deferred post bounding the page cache lifetime. Conditional
+        # GET validators come from the cache.
+        ("/", 3),
+        # The category itself, which stores the number of its posts
+        # instead of COUNT(*), the page and the next deferred post.
+        ("/category/{post.category.slug}/", 3),
+        # The profile owner joined with the stored post counters, and
+        # the page.
+        ("/profile/{post.author.username}/", 2),
+    ),
+)
+def test_feed_query_count_is_fixed(
+        client, django_assert_num_queries, feed_posts, url_template, n_queries
+):
+    url = url_template.format(post=feed_posts[0])
+    with django_assert_num_queries(n_queries):
+        response = client.get(url)
+    assert len(response.context["page_obj"]) > 0
+
+
+@pytest.fixture
+def many_feed_posts(mixer, user, published_category):
+    same_date = timezone.now() - timedelta(days=1)
+    return mixer.cycle(N_PER_PAGE * 2 + 5).blend(
+        "blog.Post",
+        author=user,
+        is_published=True,
+        category=published_category,
+        # Half of the posts share a date to check the id tie-breaker.
+        pub_date=(
+            same_date - timedelta(hours=i % 2 * i) for i in range(100)
+        ),
+    )
+
+
+def test_cursor_pagination_walks_whole_feed(
+        client, many_feed_posts, django_assert_num_queries
+):
+    seen = []
+    url = "/?cursor="
+    # The page and, on the first miss only, the next deferred post.
+    # No COUNT(*).
+    num_queries = 2
+    while url:
+        with django_assert_num_queries(num_queries):
+            response = client.get(url)
+        num_queries = 1
+        page = response.context["page_obj"]
+        assert len(page) <= N_PER_PAGE
+        seen.extend(post.pk for post in page)
+        url = f"/?cursor={page.next_cursor}" if page.has_next() else None
+    assert sorted(seen) == sorted(post.pk for post in many_feed_posts), (
+        "Убедитесь, что курсорная пагинация показывает каждую публикацию"
+        " ровно один раз."
+    )
+
+    previous_page = client.get(
+        f"/?cursor={page.previous_cursor}"
+    ).context["page_obj"]
+    assert [post.pk for post in previous_page] == seen[
+        -len(page) - N_PER_PAGE:-len(page)
+    ], "Убедитесь, что ссылка на предыдущую страницу курсора работает."
+
+
+def test_invalid_cursor_returns_404(client):
+    assert client.get("/?cursor=garbage").status_code == 404
+
+
+@pytest.mark.skipif(
+    connection.vendor != "sqlite", reason="Разбирается план запроса SQLite."
+)
+@pytest.mark.parametrize(
+    "url_template, index_name",
+    (
+        ("/", "post_visible_feed_idx"),
+        ("/category/{post.category.slug}/", "post_category_pub_date_idx"),
+        ("/profile/{post.author.username}/", "post_author_pub_date_idx"),
+        ("/posts/{post.id}/", "comment_post_created_at_idx"),
+    ),
+)
+def test_list_queries_use_indexes(
+        client, feed_posts, url_template, index_name
+):
+    with CaptureQueriesContext(connection) as captured:
+        client.get(url_template.format(post=feed_posts[0]))
+    plans = []
+    with connection.cursor() as cursor:
+        for query in captured.captured_queries:
+            cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+            plans.extend(row[-1] for row in cursor.fetchall())
+    assert any(f"USING INDEX {index_name}" in step for step in plans), (
+        f"Убедитесь, что запрос страницы использует индекс `{index_name}`."
+        f" План запроса: {plans}"
+    )
+
+
+def _rendered_cards(response):
+    return [
+        template for template in response.templates
+        if template.name == "includes/post_card.html"
+    ]
+
+
+def test_post_cards_are_cached(user_client, feed_posts):
+    # Logged in users bypass the page cache but still reuse the cards.
+    assert _rendered_cards(user_client.get("/"))
+    assert not _rendered_cards(user_client.get("/")), (
+        "Убедитесь, что карточки публикаций берутся из кэша при повторном"
+        " запросе страницы."
+    )
+
+
+def test_post_card_cache_is_invalidated(user_client, mixer, feed_posts):
+    client = user_client
+    post = feed_posts[0]
+    client.get("/")
+
+    post.title = "Обновлённый заголовок"
+    post.save()
+    assert post.title in client.get("/").content.decode("utf-8")
+
+    post.category.title = "Новая категория"
+    post.category.save()
+    assert "Новая категория" in client.get("/").content.decode("utf-8")
+
+    mixer.blend("blog.Comment", post=post, author=post.author)
+    assert "Комментарии (1)" in client.get("/").content.decode("utf-8"), (
+        "Убедитесь, что карточка обновляется при изменении числа"
+        " комментариев."
+    )
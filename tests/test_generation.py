@@ -0,0 +1,55 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+OPTIONS = dict(
+    users=5, categories=3, locations=4, posts=200, comments=600,
+    unpublished=0.1, future=0.1, seed=42, batch_size=64,
+)
+
+
+def _snapshot():
+    from blog.models import Post
+
+    return list(Post.objects.order_by("pk").values_list(
+        "title", "is_published", "comment_count"
+    ))
+
+
+def test_generated_data_is_deterministic():
+    from blog.models import Category, Location, Post, User
+
+    call_command("generate_blog_data", stdout=io.StringIO(), **OPTIONS)
+    first = _snapshot()
+    for model in (Post, Category, Location, User):
+        model.objects.all().delete()
+    call_command("generate_blog_data", stdout=io.StringIO(), **OPTIONS)
+    assert _snapshot() == first, (
+        "Убедитесь, что при одинаковом seed создаются одинаковые данные."
+    )
+
+
+def test_generated_data_is_consistent(django_assert_max_num_queries):
+    from blog.counters import reconcile_comment_counts, reconcile_post_counts
+    from blog.models import Comment, Post
+
+    # Inserts go in batches, so the number of queries does not depend
+    # on the number of objects.
+    with django_assert_max_num_queries(40):
+        call_command("generate_blog_data", stdout=io.StringIO(), **OPTIONS)
+
+    assert Post.objects.count() == OPTIONS["posts"]
+    assert Comment.objects.count() == OPTIONS["comments"]
+    assert reconcile_comment_counts(Post.objects.all()) == 0, (
+        "Убедитесь, что счётчики комментариев заполняются верно."
+    )
+    assert reconcile_post_counts() == (0, 0), (
+        "Убедитесь, что счётчики публикаций заполняются верно."
+    )
+    assert Post.objects.filter(is_published=False).exists()
+    assert Post.objects.filter(pub_date__gt=timezone.now()).exists()
+    assert Post.objects.published().exists()
@@ -0,0 +1,229 @@
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
+
+import pytest
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+from django.utils import timezone
+from PIL import Image
+
+pytestmark = [pytest.mark.django_db]
+
+# EXIF orientation tag and the value for "rotated 90° clockwise".
+ORIENTATION_TAG = 0x0112
+ROTATE_90_CW = 6
+
+
+def make_image(size=(1000, 500), orientation=None):
+    img_io = BytesIO()
+    exif = Image.Exif()
+    if orientation:
+        exif[ORIENTATION_TAG] = orientation
+    Image.new("RGB", size, color=(73, 109, 137)).save(
+        img_io, "JPEG", exif=exif
+    )
+    return ImageFile(img_io, name="large_image.jpg")
+
+
+@pytest.fixture
+def make_post(mixer, user, published_category):
+    def _make_post(image):
+        return mixer.blend(
+            "blog.Post",
+            author=user,
+            is_published=True,
+            category=published_category,
+            pub_date=timezone.now() - timedelta(days=1),
+            image=image,
+        )
+    return _make_post
+
+
+def test_upload_is_queued_and_processed(make_post):
+    from blog.models import ImageJob, ImageStatus
+
+    post = make_post(make_image())
+    post.refresh_from_db()
+    assert post.image_status == ImageStatus.PENDING
+    assert post.thumbnail_url == post.image.url, (
+        "Убедитесь, что до обработки фото в карточке показывается оригинал."
+    )
+    assert ImageJob.objects.filter(post=post).count() == 1
+
+    call_command("process_image_jobs", once=True)
+    post.refresh_from_db()
+    assert post.image_status == ImageStatus.READY
+    assert post.image_variants == "320,640", (
+        "Убедитесь, что фоновая задача создаёт уменьшенные копии фото."
+    )
+    storage = post.image.storage
+    for width, url in post.image_variant_urls():
+        name = url[len(storage.base_url):]
+        with storage.open(name) as variant_file:
+            assert Image.open(variant_file).width == width
+
+
+def test_exif_orientation_is_applied_and_stripped(make_post):
+    post = make_post(make_image(orientation=ROTATE_90_CW))
+    call_command("process_image_jobs", once=True)
+    post.refresh_from_db()
+    with post.image.open("rb") as image_file:
+        image = Image.open(image_file)
+        assert image.size == (500, 1000), (
+            "Убедитесь, что фото поворачивается согласно EXIF."
+        )
+        assert not image.getexif(), (
+            "Убедитесь, что из фото удаляются метаданные EXIF."
+        )
+
+
+def test_failing_job_is_retried_then_dead_lettered(make_post):
+    from blog.models import ImageJob, ImageStatus
+
+    post = make_post(make_image())
+    with mock.patch(
+        "blog.jobs.generate_image_variants", side_effect=OSError("broken")
+    ):
+        call_command("process_image_jobs", once=True)
+        job = ImageJob.objects.get(post=post)
+        assert job.status == ImageJob.Status.PENDING
+        assert job.run_after > timezone.now(), (
+            "Убедитесь, что повтор задачи откладывается."
+        )
+
+        ImageJob.objects.update(run_after=timezone.now())
+        call_command("process_image_jobs", once=True, max_attempts=2)
+    job.refresh_from_db()
+    post.refresh_from_db()
+    assert job.status == ImageJob.Status.FAILED
+    assert "broken" in job.last_error
+    assert post.image_status == ImageStatus.FAILED
+
+    call_command("process_image_jobs", once=True, retry_dead=True)
+    post.refresh_from_db()
+    assert post.image_status == ImageStatus.READY
+
+
+def test_feed_serves_thumbnails(client, make_post):
+    post = make_post(make_image())
+    call_command("process_image_jobs", once=True)
+    post.refresh_from_db()
+    content = client.get("/").content.decode("utf-8")
+    assert f'src="{post.thumbnail_url}"' in content
+    assert f'srcset="{post.image_srcset}"' in content
+    assert post.image.url not in content, (
+        "Убедитесь, что лента не загружает фото в исходном размере."
+    )
+    content = client.get(f"/posts/{post.id}/").content.decode("utf-8")
+    assert post.image.url in content, (
+        "Убедитесь, что страница публикации ссылается на исходное фото."
+    )
+
+
+def test_feed_skips_srcset_until_variants_are_ready(client, make_post):
+    from blog.cache import ALL_PAGES, purge_pages
+    from blog.models import ImageStatus, Post
+
+    post = make_post(make_image())
+    call_command("process_image_jobs", once=True)
+    Post.objects.filter(pk=post.pk).update(image_status=ImageStatus.PENDING)
+    purge_pages(ALL_PAGES)
+    content = client.get("/").content.decode("utf-8")
+    assert "srcset=" not in content, (
+        "Убедитесь, что атрибут srcset выводится только для готовых"
+        " уменьшенных копий фото."
+    )
+
+
+def test_abandoned_running_job_is_reclaimed(make_post):
+    from blog.jobs import IMAGE_JOB_LEASE, claim_image_jobs
+    from blog.models import ImageJob, ImageStatus
+
+    post = make_post(make_image())
+    assert len(claim_image_jobs(10)) == 1
+    assert not claim_image_jobs(10), (
+        "Убедитесь, что выполняющуюся задачу не забирает другой обработчик."
+    )
+    ImageJob.objects.update(
+        claimed_at=timezone.now() - timedelta(seconds=IMAGE_JOB_LEASE + 1)
+    )
+    call_command("process_image_jobs", once=True)
+    post.refresh_from_db()
+    assert post.image_status == ImageStatus.READY, (
+        "Убедитесь, что задача, брошенная упавшим обработчиком,"
+        " выполняется повторно после истечения аренды."
+    )
+    assert ImageJob.objects.get(post=post).attempts == 2
+
+
+def test_result_of_replaced_image_is_discarded(make_post):
+    from blog.jobs import claim_image_jobs, process_image_job
+    from blog.models import ImageJob, ImageStatus, Post
+
+    post = make_post(make_image())
+    (job,) = claim_image_jobs(10)
+    post.image = make_image(size=(800, 400))
+    post.save()
+    new_name = Post.objects.get(pk=post.pk).image.name
+    assert process_image_job(job)
+    post.refresh_from_db()
+    assert post.image.name == new_name, (
+        "Убедитесь, что обработка старого фото не затирает новое."
+    )
+    assert post.image_status == ImageStatus.PENDING
+    assert ImageJob.objects.get(pk=job.pk).status == ImageJob.Status.DONE
+
+
+def test_failed_processing_keeps_the_uploaded_original(make_post):
+    from blog.models import ImageJob
+
+    post = make_post(make_image(orientation=ROTATE_90_CW))
+    uploaded = post.image.name
+    with mock.patch(
+        "blog.jobs.generate_image_variants", side_effect=OSError("broken")
+    ):
+        call_command("process_image_jobs", once=True)
+    post.refresh_from_db()
+    assert post.image.name == uploaded
+    assert post.image.storage.exists(uploaded), (
+        "Убедитесь, что исходное фото не удаляется, пока публикация"
+        " не переключена на обработанную копию."
+    )
+    assert ImageJob.objects.get(post=post).status == ImageJob.Status.PENDING
+
+
+def test_stripped_copy_keeps_jpeg_quality(make_post):
+    post = make_post(make_image(orientation=ROTATE_90_CW))
+    uploaded = post.image.name
+    with post.image.open("rb") as image_file:
+        quantization = Image.open(image_file).quantization
+    call_command("process_image_jobs", once=True)
+    post.refresh_from_db()
+    assert post.image.name != uploaded
+    assert not post.image.storage.exists(uploaded), (
+        "Убедитесь, что исходное фото удаляется после переключения"
+        " публикации на копию без EXIF."
+    )
+    with post.image.open("rb") as image_file:
+        assert Image.open(image_file).quantization == quantization, (
+            "Убедитесь, что копия без EXIF сохраняет качество JPEG."
+        )
+
+
+def test_variants_of_replaced_image_are_deleted(make_post):
+    post = make_post(make_image())
+    call_command("process_image_jobs", once=True)
+    post.refresh_from_db()
+    storage = post.image.storage
+    old_variants = [
+        url[len(storage.base_url):] for _, url in post.image_variant_urls()
+    ]
+    assert old_variants and all(map(storage.exists, old_variants))
+
+    post.image = make_image(size=(800, 400))
+    post.save()
+    call_command("process_image_jobs", once=True)
+    assert not any(map(storage.exists, old_variants)), (
+        "Убедитесь, что уменьшенные копии заменённого фото удаляются."
+    )
@@ -0,0 +1,148 @@
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def cached_post(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post",
+        author=user,
+        is_published=True,
+        category=published_category,
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+
+
+@pytest.mark.parametrize(
+    "url", ("/", "/category/{post.category.slug}/", "/pages/about/")
+)
+def test_anonymous_pages_are_cached(
+        client, cached_post, url, django_assert_num_queries
+):
+    from blog.cache import get_page_cache_stats
+
+    url = url.format(post=cached_post)
+    response = client.get(url)
+    assert response["X-Page-Cache"] == "MISS"
+    assert "Cookie" in response["Vary"]
+    with django_assert_num_queries(0):
+        response = client.get(url)
+    assert response["X-Page-Cache"] == "HIT", (
+        "Убедитесь, что страница для анонимного пользователя берётся"
+        " из кэша."
+    )
+    assert get_page_cache_stats() == {"hits": 1, "misses": 1}
+
+
+@pytest.mark.parametrize("url", ("/", "/category/{post.category.slug}/"))
+def test_cached_page_answers_matching_etag_with_304(
+        client, cached_post, url, django_assert_num_queries
+):
+    url = url.format(post=cached_post)
+    etag = client.get(url)["ETag"]
+    with django_assert_num_queries(0):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response["X-Page-Cache"] == "HIT"
+    assert response.status_code == 304, (
+        "Убедитесь, что закэшированная страница отвечает кодом 304"
+        " при совпадении ETag."
+    )
+    assert not response.content
+
+
+def test_logged_in_users_bypass_page_cache(user_client, cached_post):
+    user_client.get("/")
+    assert "X-Page-Cache" not in user_client.get("/")
+
+
+@pytest.mark.parametrize(
+    "change",
+    (
+        lambda mixer, post: mixer.blend(
+            "blog.Post", author=post.author, category=post.category,
+            is_published=True, pub_date=timezone.now() - timedelta(hours=1)
+        ),
+        lambda mixer, post: mixer.blend(
+            "blog.Comment", post=post, author=post.author
+        ),
+        lambda mixer, post: post.category.save(),
+    ),
+    ids=("post", "comment", "category"),
+)
+def test_page_cache_is_purged(client, mixer, cached_post, change):
+    for url in ("/", f"/category/{cached_post.category.slug}/"):
+        client.get(url)
+        change(mixer, cached_post)
+        assert client.get(url)["X-Page-Cache"] == "MISS", (
+            "Убедитесь, что кэш страницы сбрасывается при изменении"
+            " публикаций, комментариев и категорий."
+        )
+
+
+def test_page_cache_is_purged_when_scheduled_post_goes_live(
+        client, mixer, cached_post
+):
+    from blog.publication import publish_due_posts
+
+    scheduled = mixer.blend(
+        "blog.Post",
+        author=cached_post.author,
+        is_published=True,
+        category=cached_post.category,
+        pub_date=timezone.now() + timedelta(hours=1),
+    )
+    assert scheduled not in client.get("/").context["page_obj"]
+    assert client.get("/")["X-Page-Cache"] == "HIT"
+    with mock.patch(
+        "django.utils.timezone.now",
+        return_value=scheduled.pub_date + timedelta(seconds=1)
+    ):
+        response = client.get("/")
+        assert response["X-Page-Cache"] == "MISS", (
+            "Убедитесь, что закэшированная страница устаревает к дате"
+            " следующей отложенной публикации."
+        )
+        assert client.get("/")["X-Page-Cache"] == "MISS", (
+            "Убедитесь, что страница не кэшируется, пока наступившая"
+            " публикация ждёт `publish_scheduled_posts`."
+        )
+        # The scheduler may run in another process whose purge does
+        # not reach this cache.
+        with mock.patch("blog.signals.purge_pages"):
+            publish_due_posts()
+        response = client.get("/")
+    assert response["X-Page-Cache"] == "MISS"
+    assert scheduled in response.context["page_obj"], (
+        "Убедитесь, что отложенная публикация появляется на закэшированной"
+        " странице вовремя."
+    )
+
+
+def test_next_scheduled_date_is_cached_between_page_misses(
+        client, mixer, cached_post
+):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    mixer.blend(
+        "blog.Post",
+        author=cached_post.author,
+        is_published=True,
+        category=cached_post.category,
+        pub_date=timezone.now() + timedelta(hours=1),
+    )
+    client.get("/")
+    with CaptureQueriesContext(connection) as queries:
+        assert client.get("/?page=1")["X-Page-Cache"] == "MISS"
+    assert not [
+        query for query in queries
+        if 'MIN("blog_post"."pub_date")' in query["sql"]
+    ], (
+        "Убедитесь, что дата следующей отложенной публикации не"
+        " вычисляется заново при каждом промахе кэша страниц."
+    )
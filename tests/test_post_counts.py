@@ -0,0 +1,102 @@
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+def counters(category, author):
+    from blog.models import ProfileStats
+
+    category.refresh_from_db()
+    stats = ProfileStats.objects.get(user=author)
+    return (
+        category.published_post_count,
+        stats.post_count,
+        stats.published_post_count,
+    )
+
+
+def test_counters_follow_post_changes(
+        mixer, user, published_category, another_category
+):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timedelta(days=1),
+    )
+    assert counters(published_category, user) == (1, 1, 1), (
+        "Убедитесь, что новая публикация учитывается в счётчиках"
+        " категории и автора."
+    )
+    post.is_published = False
+    post.save()
+    assert counters(published_category, user) == (0, 1, 0), (
+        "Убедитесь, что снятая с публикации запись убирается из"
+        " счётчиков опубликованных публикаций."
+    )
+    post.is_published = True
+    post.category = another_category
+    post.save()
+    assert counters(published_category, user) == (0, 1, 1)
+    assert counters(another_category, user)[0] == 1
+    post.delete()
+    assert counters(another_category, user) == (0, 0, 0), (
+        "Убедитесь, что удалённая публикация убирается из счётчиков."
+    )
+
+
+def test_category_visibility_recounts_authors(
+        mixer, user, published_category
+):
+    mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timedelta(days=1),
+    )
+    published_category.is_published = False
+    published_category.save()
+    assert counters(published_category, user) == (0, 3, 0), (
+        "Убедитесь, что публикации скрытой категории не считаются"
+        " опубликованными."
+    )
+
+
+def test_scheduled_posts_enter_counters_when_published(
+        mixer, user, published_category
+):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() + timedelta(hours=1),
+    )
+    assert counters(published_category, user) == (0, 1, 0)
+    later = post.pub_date + timedelta(minutes=1)
+    with mock.patch("django.utils.timezone.now", return_value=later):
+        call_command("publish_scheduled_posts", once=True)
+    assert counters(published_category, user) == (1, 1, 1), (
+        "Убедитесь, что команда `publish_scheduled_posts` добавляет в"
+        " счётчики отложенные публикации после даты публикации."
+    )
+
+
+def test_category_page_uses_stored_count(
+        client, mixer, user, published_category
+):
+    from blog.models import Category
+
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timedelta(days=1),
+    )
+    Category.objects.filter(pk=published_category.pk).update(
+        published_post_count=25
+    )
+    response = client.get(f"/category/{published_category.slug}/")
+    assert response.context["paginator"].count == 25, (
+        "Убедитесь, что пагинатор страницы категории берёт число"
+        " публикаций из счётчика категории."
+    )
+    call_command("reconcile_post_counts")
+    published_category.refresh_from_db()
+    assert published_category.published_post_count == 1
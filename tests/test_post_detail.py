@@ -0,0 +1,58 @@
+import pytest
+
+from conftest import N_PER_FIXTURE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def commented_post(mixer, post_with_published_location):
+    mixer.cycle(N_PER_FIXTURE).blend(
+        "blog.Comment", post=post_with_published_location,
+        author=mixer.blend("auth.User")
+    )
+    return post_with_published_location
+
+
+def test_detail_page_query_budget(
+        client, commented_post, django_assert_num_queries
+):
+    # The post with its relations and the comments with their authors.
+    with django_assert_num_queries(2):
+        response = client.get(f"/posts/{commented_post.id}/")
+    assert response.status_code == 200
+    assert len(response.context["comments"]) == N_PER_FIXTURE
+
+
+def test_author_sees_own_unpublished_post(
+        user_client, another_user_client, commented_post
+):
+    commented_post.is_published = False
+    commented_post.save()
+    url = f"/posts/{commented_post.id}/"
+    assert user_client.get(url).status_code == 200, (
+        "Убедитесь, что автор видит свою снятую с публикации запись."
+    )
+    assert another_user_client.get(url).status_code == 404
+
+
+def test_long_thread_is_paginated(
+        client, mixer, post_with_published_location,
+        django_assert_num_queries
+):
+    from blog.views import DISPLAYING_COMMENTS_ON_PAGE
+
+    post = post_with_published_location
+    mixer.cycle(DISPLAYING_COMMENTS_ON_PAGE + 5).blend(
+        "blog.Comment", post=post, author=mixer.SELECT
+    )
+    with django_assert_num_queries(2):
+        response = client.get(f"/posts/{post.id}/")
+    assert len(response.context["comments"]) == DISPLAYING_COMMENTS_ON_PAGE
+    assert response.context["comments_next_page"] == 2
+
+    response = client.get(f"/posts/{post.id}/?comments_page=2")
+    assert len(response.context["comments"]) == 5, (
+        "Убедитесь, что длинная ветка комментариев разбита на страницы."
+    )
+    assert response.context["comments_next_page"] is None
@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def visible_post(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timedelta(days=1),
+    )
+
+
+def test_is_visible_follows_post_and_category(visible_post):
+    visible_post.refresh_from_db()
+    assert visible_post.is_visible, (
+        "Убедитесь, что флаг `is_visible` ставится при сохранении"
+        " опубликованной записи."
+    )
+    visible_post.pub_date = timezone.now() + timedelta(days=1)
+    visible_post.save()
+    visible_post.refresh_from_db()
+    assert not visible_post.is_visible
+
+    visible_post.pub_date = timezone.now() - timedelta(days=1)
+    visible_post.save()
+    category = visible_post.category
+    category.is_published = False
+    category.save()
+    visible_post.refresh_from_db()
+    assert not visible_post.is_visible, (
+        "Убедитесь, что публикации скрытой категории перестают быть"
+        " видимыми."
+    )
+
+
+def test_refresh_fixes_drifted_flags(visible_post):
+    from blog.models import Post
+
+    Post.objects.filter(pk=visible_post.pk).update(is_visible=False)
+    call_command("publish_scheduled_posts", once=True, refresh=True)
+    visible_post.refresh_from_db()
+    assert visible_post.is_visible, (
+        "Убедитесь, что `publish_scheduled_posts --refresh` сверяет флаг"
+        " `is_visible` всех публикаций."
+    )
@@ -0,0 +1,71 @@
+import logging
+
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_server_timing_header(client):
+    response = client.get("/")
+    assert response["Server-Timing"].startswith("db;dur="), (
+        "Убедитесь, что ответ содержит заголовок Server-Timing со временем"
+        " запросов к базе данных."
+    )
+
+
+def test_over_budget_requests_are_logged(client, settings, caplog):
+    settings.BLOG_QUERY_BUDGETS = {"blog:index": 1}
+    with caplog.at_level(logging.WARNING, logger="blog.queries"):
+        client.get("/")
+    assert any(
+        "budget 1" in record.getMessage() for record in caplog.records
+    ), "Убедитесь, что превышение бюджета запросов записывается в лог."
+
+
+def test_repeated_queries_are_detected(user):
+    from django.contrib.auth.models import User
+    from django.db import connection
+
+    from blog.middleware import QueryCollector
+
+    collector = QueryCollector()
+    with connection.execute_wrapper(collector):
+        User.objects.filter(pk=user.pk).exists()
+        User.objects.filter(pk=user.pk).exists()
+        User.objects.filter(pk=user.pk + 1).exists()
+    assert collector.count == 3
+    assert list(collector.duplicates.values()) == [2], (
+        "Убедитесь, что повтором считается запрос с теми же параметрами."
+    )
+
+
+def test_stats_are_staff_only(client, user_client, admin_client):
+    client.get("/")
+    assert client.get("/stats/").status_code == 302
+    assert user_client.get("/stats/").status_code == 403
+    stats = admin_client.get("/stats/").json()
+    assert stats["queries"]["blog:index"]["requests"] >= 1, (
+        "Убедитесь, что статистика запросов собирается по именам"
+        " представлений."
+    )
+    assert "hits" in stats["page_cache"]
+    assert "databases" in stats["connections"]
+
+
+def test_stats_are_buffered_per_process(client, settings):
+    from django.core.cache import cache
+
+    from blog.middleware import flush_query_stats, get_query_stats
+
+    flush_query_stats()
+    cache.clear()
+    settings.BLOG_QUERY_STATS_FLUSH_SECONDS = 3600
+    client.get("/pages/about/")
+    assert cache.get("query_stats:pages:about:requests") is None, (
+        "Убедитесь, что статистика запросов не пишется в кэш на каждый"
+        " запрос."
+    )
+    assert get_query_stats()["pages:about"]["requests"] == 1, (
+        "Убедитесь, что статистика собирается по списку представлений"
+        " из URLconf без регистрации в кэше."
+    )
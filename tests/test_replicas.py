@@ -0,0 +1,70 @@
+import pytest
+from django.urls import reverse
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def replica_choices(settings, monkeypatch):
+    """Use 'default' as the replica and record every replica choice."""
+    from blog import routers
+
+    settings.DATABASE_REPLICAS = ["default"]
+    choices = []
+
+    def choice(replicas):
+        choices.append(replicas)
+        return replicas[0]
+
+    monkeypatch.setattr(routers.random, "choice", choice)
+    return choices
+
+
+def test_router_uses_replicas_only_for_replica_reads(settings):
+    from blog.models import Post
+    from blog.routers import ReplicaRouter, replica_reads, routed_request
+
+    settings.DATABASE_REPLICAS = ["replica"]
+    router = ReplicaRouter()
+    assert router.db_for_read(Post) == "default"
+    with replica_reads():
+        assert router.db_for_read(Post) == "replica", (
+            "Убедитесь, что чтение в списках и на страницах публикаций"
+            " направляется на реплику."
+        )
+        with routed_request(pinned=True):
+            assert router.db_for_read(Post) == "default", (
+                "Убедитесь, что после записи посетитель читает с основной"
+                " базы данных."
+            )
+        assert router.db_for_write(Post) == "default"
+    assert router.allow_migrate("default", "blog")
+    assert not router.allow_migrate("replica", "blog")
+
+
+def test_list_pages_read_from_replica(client, replica_choices):
+    response = client.get(reverse("blog:index"))
+    assert response.status_code == 200
+    assert replica_choices, (
+        "Убедитесь, что главная страница читает данные с реплики."
+    )
+    assert "primary_until" not in response.cookies
+
+
+def test_author_is_pinned_to_primary_after_comment(
+    user_client, mixer, user, replica_choices
+):
+    post = mixer.blend("blog.Post", author=user, is_published=True)
+    response = user_client.post(
+        reverse("blog:add_comment", args=(post.pk,)), {"text": "Текст"}
+    )
+    assert "primary_until" in response.cookies, (
+        "Убедитесь, что после комментария посетителю ставится cookie,"
+        " закрепляющая его за основной базой данных."
+    )
+    replica_choices.clear()
+    user_client.get(reverse("blog:post_detail", args=(post.pk,)))
+    assert not replica_choices, (
+        "Убедитесь, что в течение REPLICA_STICKY_SECONDS после записи"
+        " страницы читаются с основной базы данных."
+    )
@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(params=("fts5", "terms"))
+def search_backend(request, settings):
+    settings.BLOG_SEARCH_BACKEND = request.param
+    return request.param
+
+
+@pytest.fixture
+def make_post(mixer, user, published_category):
+    def make(title, text, **kwargs):
+        kwargs.setdefault("is_published", True)
+        kwargs.setdefault("pub_date", timezone.now() - timedelta(days=1))
+        return mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            title=title, text=text, **kwargs
+        )
+    return make
+
+
+def test_stemming_matches_word_forms():
+    from blog.search import tokenize
+
+    assert tokenize("Кошки гуляли по крышам") == tokenize(
+        "кошка гуляла по крыше"
+    ), "Убедитесь, что разные формы слова приводятся к одной основе."
+
+
+def test_search_matches_word_forms_and_ranks_title_first(
+        search_backend, make_post
+):
+    from blog.search import search_posts
+
+    in_text = make_post("Прогулка", "Соседские кошки гуляли во дворе.")
+    in_title = make_post("Про кошку", "Рыжая кошка спит.")
+    make_post("Собаки", "Про собак.")
+
+    assert list(search_posts("кошками")) == [in_title, in_text], (
+        "Убедитесь, что поиск находит разные формы слова и ставит"
+        " совпадения в заголовке выше."
+    )
+    assert list(search_posts("кошка двор")) == [in_text], (
+        "Убедитесь, что находятся публикации со всеми словами запроса."
+    )
+
+
+def test_search_respects_publication_rules(search_backend, make_post):
+    from blog.search import search_posts
+
+    make_post("Черновик про кошку", "Текст", is_published=False)
+    make_post(
+        "Будущее про кошку", "Текст",
+        pub_date=timezone.now() + timedelta(days=1)
+    )
+    assert not search_posts("кошки").exists(), (
+        "Убедитесь, что поиск не показывает снятые с публикации и"
+        " отложенные публикации."
+    )
+
+
+def test_search_index_follows_edits_and_deletes(search_backend, make_post):
+    from blog.search import search_posts
+
+    post = make_post("Про кошку", "Текст")
+    post.title = "Про собак"
+    post.save()
+    assert list(search_posts("собака")) == [post]
+    assert not search_posts("кошка").exists(), (
+        "Убедитесь, что индекс обновляется при изменении публикации."
+    )
+    post.delete()
+    assert not search_posts("собака").exists(), (
+        "Убедитесь, что удалённая публикация пропадает из индекса."
+    )
+
+
+def test_search_page(client, make_post):
+    post = make_post("Про кошку", "Текст")
+    response = client.get("/search/", {"q": "кошки"})
+    assert list(response.context["page_obj"]) == [post]
+    assert client.get("/search/").status_code == 200
+
+
+def test_search_backend_is_checked_on_the_read_database(monkeypatch):
+    from blog import search
+    from blog.models import Post
+
+    checked = []
+    monkeypatch.setattr(
+        search, "search_backend",
+        lambda using="default": checked.append(using) or "terms",
+    )
+    search.search_posts("кошка", Post.objects.using("replica1"))
+    assert checked == ["replica1"], (
+        "Убедитесь, что наличие индекса FTS5 проверяется в базе, из"
+        " которой читается запрос."
+    )
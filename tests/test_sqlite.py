@@ -0,0 +1,29 @@
+import pytest
+from django.db import connection
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != "sqlite", reason="Проверяются настройки SQLite."
+    ),
+]
+
+
+def test_connection_pragmas(settings):
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA busy_timeout")
+        busy_timeout = cursor.fetchone()[0]
+        cursor.execute("PRAGMA synchronous")
+        synchronous = cursor.fetchone()[0]
+    assert busy_timeout == settings.SQLITE_PRAGMAS["busy_timeout"], (
+        "Убедитесь, что новым соединениям SQLite задаётся busy_timeout."
+    )
+    # 1 is NORMAL.
+    assert synchronous == 1
+
+
+def test_invalid_pragma_is_rejected():
+    from blog.sqlite import apply_pragmas
+
+    with connection.cursor() as cursor, pytest.raises(ValueError):
+        apply_pragmas(cursor, {"journal_mode": "WAL; DROP TABLE blog_post"})
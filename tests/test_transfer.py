@@ -0,0 +1,111 @@
+import io
+import json
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.core.serializers.json import DjangoJSONEncoder
+
+pytestmark = [pytest.mark.django_db]
+
+DB_JSON = settings.BASE_DIR.parent / "db.json"
+
+
+def test_import_fixture():
+    from blog.models import Category, Post
+    from blog.search import search_posts
+
+    fixture = json.loads(DB_JSON.read_text(encoding="utf-8"))
+    expected = {
+        obj["pk"]: obj["fields"]["created_at"]
+        for obj in fixture if obj["model"] == "blog.post"
+    }
+    call_command("import_blog", str(DB_JSON), stdout=io.StringIO())
+
+    assert Post.objects.count() == len(expected)
+    assert Category.objects.exists()
+    post = Post.objects.get(pk=next(iter(expected)))
+    assert post.created_at.isoformat().startswith(
+        expected[post.pk].rstrip("Z")[:19]
+    ), "Убедитесь, что при загрузке сохраняются даты создания объектов."
+    assert search_posts(post.title, Post.objects.all()).exists(), (
+        "Убедитесь, что загруженные публикации попадают в поисковый индекс."
+    )
+
+
+def test_export_import_round_trip(tmp_path, mixer, user, published_category):
+    from blog.models import Comment, Post
+
+    posts = mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category
+    )
+    mixer.cycle(4).blend("blog.Comment", post=posts[0], author=user)
+    path = tmp_path / "blog.jsonl"
+    call_command("export_blog", str(path), batch_size=2, stderr=io.StringIO())
+    objects = [
+        json.loads(line)
+        for line in path.read_text(encoding="utf-8").splitlines()
+    ]
+    assert len(objects) == 1 + 1 + 3 + 4
+    # A stale counter in the file must be fixed by the recount.
+    for obj in objects:
+        obj["fields"].pop("comment_count", None)
+    path.write_text(
+        "".join(json.dumps(obj) + "\n" for obj in objects), encoding="utf-8"
+    )
+
+    Comment.objects.all().delete()
+    Post.objects.all().delete()
+    published_category.delete()
+    user.delete()
+    out = io.StringIO()
+    call_command("import_blog", str(path), batch_size=2, stdout=out)
+
+    assert "объектов/с" in out.getvalue()
+    assert Post.objects.get(pk=posts[0].pk).comment_count == 4, (
+        "Убедитесь, что после загрузки пересчитываются счётчики"
+        " комментариев."
+    )
+    assert Comment.objects.count() == 4
+    # The recount touches `updated_at` of the commented post only.
+    exported_dates = {
+        obj["pk"]: (obj["fields"]["created_at"], obj["fields"]["updated_at"])
+        for obj in objects if obj["model"] == "blog.post"
+    }
+    for post in Post.objects.exclude(pk=posts[0].pk):
+        assert exported_dates[post.pk] == tuple(
+            json.loads(json.dumps(date, cls=DjangoJSONEncoder))
+            for date in (post.created_at, post.updated_at)
+        ), (
+            "Убедитесь, что при загрузке сохраняются даты создания"
+            " и изменения публикаций."
+        )
+
+
+def test_import_writes_each_row_once(tmp_path, mixer, user, published_category):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from blog.models import Post
+    from blog.transfer import export_lines, import_objects, read_objects
+
+    mixer.cycle(3).blend("blog.Post", author=user, category=published_category)
+    lines = "".join(
+        line for line in export_lines() if '"blog.post"' in line
+    )
+    Post.objects.all().delete()
+    with CaptureQueriesContext(connection) as queries:
+        import_objects(read_objects(io.StringIO(lines)))
+    post_writes = [
+        query["sql"] for query in queries
+        if query["sql"].startswith(('INSERT INTO "blog_post"',
+                                    'UPDATE "blog_post"'))
+    ]
+    assert len(post_writes) == 1, (
+        "Убедитесь, что загруженные публикации записываются одним"
+        " запросом, без повторной записи дат."
+    )
+    updated_at = Post._meta.get_field("updated_at")
+    assert updated_at.auto_now, (
+        "Убедитесь, что после загрузки auto_now снова включён."
+    )